@@ -11,6 +11,7 @@ st.set_page_config(
 st.session_state.setdefault("messages", [])
 st.session_state.setdefault("df", None)
 st.session_state.setdefault("uploaded_filename", None)
+st.session_state.setdefault("df_version", None)
 st.session_state.setdefault("api_data", None)
 st.session_state.setdefault("llm_provider", "OpenAI")
 st.session_state.setdefault("analysis_results", {})
@@ -2,15 +2,160 @@ import streamlit as st
 import requests
 import json
 import pandas as pd
+import time
+
+from utils.dataset import set_dataset
+from utils.http_cache import DEFAULT_FRESHNESS, cached_request, get_http_cache
+from utils.http_client import (
+    DEFAULT_BACKOFF,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RETRIES,
+    MAX_BATCH_REQUESTS,
+    batch_frame,
+    expand_template,
+    get_session,
+    latency_stats,
+    run_batch,
+    template_fields,
+)
+from utils.pagination import (
+    DEFAULT_MAX_MB,
+    DEFAULT_MAX_ROWS,
+    DEFAULT_PAGE_SIZE,
+    PAGINATION_SCHEMES,
+    paginate,
+    resolve_path,
+)
+from utils.payload import TREE_MAX_DEPTH, TREE_MAX_ITEMS, TREE_MAX_STRING, parse_json, records_frame, truncate_tree
+from utils.polling import DEFAULT_CAPACITY, DEFAULT_INTERVAL, MAX_CAPACITY, MIN_INTERVAL, Poller
+from utils.preferences import get_preference
 
 st.title(":material/cloud: API Tools")
 
 st.markdown("Connect to external APIs and cloud services for data integration.")
 
+
+def store_response(state_key: str, response, payload, cache_status: str):
+    """Parse a response body once and keep the result in the session for every view of it."""
+    try:
+        with st.spinner(f"Parsing {payload.size / 1024**2:.1f} MB..."):
+            parsed = parse_json(payload) if payload.size else None
+    except ValueError:
+        parsed = None
+    st.session_state[state_key] = {
+        "status": f"{response.status_code} {response.reason}",
+        "cache": cache_status,
+        "size": payload.size,
+        "elapsed": response.elapsed.total_seconds(),
+        "headers": dict(response.headers),
+        "parsed": parsed,
+        "text": payload.preview() if parsed is None else None,
+        "frames": {},
+    }
+    payload.discard()
+    if parsed is not None:
+        st.session_state.api_data = parsed
+
+
+def show_json_tree(result: dict, key: str):
+    """Bounded tree view of a parsed response, with a path box to open deeper parts on demand."""
+    if result["parsed"] is None:
+        text = result["text"]
+        st.code(text)
+        if result["size"] > len(text.encode()):
+            st.caption(f"Showing the first {len(text):,} characters of {result['size']:,} bytes")
+        return
+    path = st.text_input("Show path", key=f"{key}_tree_path", placeholder="data.items.0",
+                         help="Dotted path of a nested value to view")
+    try:
+        node = resolve_path(result["parsed"], path)
+    except (KeyError, IndexError, ValueError, TypeError):
+        st.error(f"No value at {path!r}", icon=":material/error:")
+        return
+    tree, truncated = truncate_tree(node)
+    st.json(tree, expanded=2)
+    if truncated:
+        st.caption(f"Large lists, deep levels and long strings are cut to {TREE_MAX_ITEMS} items, "
+                   f"{TREE_MAX_DEPTH} levels and {TREE_MAX_STRING} characters; enter a path to look deeper.")
+
+
+def pagination_caps(key: str) -> tuple:
+    """Row and size limits for a paginated fetch."""
+    col1, col2 = st.columns(2)
+    with col1:
+        max_rows = st.number_input("Max rows", min_value=1, max_value=10_000_000, value=DEFAULT_MAX_ROWS,
+                                   step=1000, key=f"{key}_max_rows")
+    with col2:
+        max_mb = st.number_input("Max download (MB)", min_value=1, max_value=10_000, value=DEFAULT_MAX_MB,
+                                 key=f"{key}_max_mb")
+    return max_rows, max_mb * 1024**2
+
+
+def run_pagination(request: dict, scheme: str, options: dict, caps: tuple, state_key: str):
+    """Fetch every page into the session, showing progress as pages arrive."""
+    progress_text = st.empty()
+    
+    def show_progress(pages, rows, bytes_read):
+        progress_text.caption(f"Fetched {pages} page(s), {rows:,} rows, {bytes_read / 1024**2:.1f} MB")
+    
+    try:
+        frame, info = paginate(request, scheme, options, *caps, progress=show_progress)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Request failed: {str(e)}", icon=":material/error:")
+        return
+    except ValueError as e:
+        st.error(str(e), icon=":material/error:")
+        return
+    finally:
+        progress_text.empty()
+    st.session_state[state_key] = {"frame": frame, "info": info}
+
+
+def show_pagination_result(state_key: str, source: str):
+    """Combined pages with a save button; kept in the session so saving survives the rerun."""
+    result = st.session_state.get(state_key)
+    if not result:
+        return
+    info = result["info"]
+    summary = f"Fetched {info['rows']:,} rows from {info['pages']} page(s), {info['bytes'] / 1024**2:.1f} MB"
+    if info["error"]:
+        st.warning(f"{summary}. Pagination stopped on {info['stopped']}", icon=":material/warning:")
+    else:
+        st.success(f"{summary} (stopped at {info['stopped']})", icon=":material/check_circle:")
+    st.dataframe(result["frame"], use_container_width=True)
+    if st.button("Save to Session", key=f"{state_key}_save"):
+        set_dataset(result["frame"], source)
+        st.success("Data saved! View in Data Analysis or Dashboard")
+
+with st.sidebar:
+    st.subheader(":material/cached: HTTP Cache")
+    http_cache_enabled = st.toggle(
+        "Cache responses",
+        value=True,
+        help="Serve repeated GETs and GraphQL queries from disk, revalidating with ETag / Last-Modified"
+    )
+    default_freshness = st.number_input(
+        "Default freshness (s)",
+        min_value=0,
+        max_value=86_400,
+        value=DEFAULT_FRESHNESS,
+        help="How long responses without Cache-Control, Expires or Last-Modified are served without asking "
+             "the server; 0 checks every time"
+    )
+    http_cache_options = {"enabled": http_cache_enabled, "default_freshness": default_freshness}
+    cache_stats = get_http_cache().stats()
+    st.caption(
+        f"{cache_stats['entries']} responses, {cache_stats['bytes'] / 1024**2:.1f} MB · "
+        f"{cache_stats['HIT']} hits, {cache_stats['REVALIDATED']} revalidated, {cache_stats['MISS']} misses"
+    )
+    if st.button("Clear HTTP cache"):
+        get_http_cache().clear()
+        st.rerun()
+
 # API type selector
 api_type = st.selectbox(
     "Select API Type",
-    ["REST API", "GraphQL", "Custom Request"],
+    ["REST API", "GraphQL", "Custom Request", "Batch Requests", "Polling"],
     help="Choose the type of API you want to connect to"
 )
 
@@ -61,9 +206,49 @@ if api_type == "REST API":
             username = st.text_input("Username")
             password = st.text_input("Password", type="password")
     
+    # Pagination
+    with st.expander("Pagination (Optional)", expanded=False):
+        pagination = st.selectbox(
+            "Scheme",
+            PAGINATION_SCHEMES,
+            help="Link header follows rel=\"next\" URLs; Offset/limit advances a query parameter until a short page"
+        )
+        page_options = {}
+        if pagination != "None":
+            page_options["records_path"] = st.text_input(
+                "Records path",
+                placeholder="data.items",
+                help="Dotted path to the list of records in each page; empty uses the first list found"
+            )
+            if pagination == "Offset/limit":
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    page_options["page_size"] = st.number_input("Page size", min_value=1, max_value=10_000,
+                                                                value=DEFAULT_PAGE_SIZE)
+                with col2:
+                    page_options["offset_param"] = st.text_input("Offset parameter", value="offset")
+                with col3:
+                    page_options["limit_param"] = st.text_input("Limit parameter", value="limit")
+            rest_caps = pagination_caps("rest")
+    
     if st.button(":material/send: Send Request", type="primary", use_container_width=True):
         if not url:
             st.error("Please enter a URL", icon=":material/error:")
+        elif pagination != "None":
+            try:
+                headers = json.loads(headers_text) if headers_text else {}
+                if auth_type == "Bearer Token":
+                    headers["Authorization"] = f"Bearer {token}"
+                elif auth_type == "API Key":
+                    headers[api_key_name] = api_key_value
+                request = {"method": method, "url": url, "headers": headers}
+                if auth_type == "Basic Auth":
+                    request["auth"] = (username, password)
+                if method in ["POST", "PUT"] and body_text:
+                    request["json"] = json.loads(body_text)
+                run_pagination(request, pagination, page_options, rest_caps, "rest_pages")
+            except json.JSONDecodeError as e:
+                st.error(f"Invalid JSON: {str(e)}", icon=":material/error:")
         else:
             try:
                 # Prepare headers
@@ -86,51 +271,11 @@ if api_type == "REST API":
                 
                 # Make request
                 with st.spinner("Sending request..."):
-                    if method == "GET":
-                        response = requests.get(url, headers=headers, auth=auth, timeout=30)
-                    elif method == "POST":
-                        response = requests.post(url, headers=headers, json=body, auth=auth, timeout=30)
-                    elif method == "PUT":
-                        response = requests.put(url, headers=headers, json=body, auth=auth, timeout=30)
-                    elif method == "DELETE":
-                        response = requests.delete(url, headers=headers, auth=auth, timeout=30)
-                
-                # Display results
-                st.success(f"Response: {response.status_code} {response.reason}", icon=":material/check_circle:")
-                
-                # Response tabs
-                tab1, tab2, tab3 = st.tabs([":material/code: Response", ":material/table_chart: Data View", ":material/info: Headers"])
-                
-                with tab1:
-                    try:
-                        json_response = response.json()
-                        st.json(json_response)
-                        
-                        # Store in session state
-                        st.session_state.api_data = json_response
-                    except:
-                        st.code(response.text)
-                
-                with tab2:
-                    try:
-                        json_response = response.json()
-                        if isinstance(json_response, list):
-                            df = pd.DataFrame(json_response)
-                            st.dataframe(df, use_container_width=True)
-                            
-                            # Option to save to session
-                            if st.button("Save to Session", key="save_api_data"):
-                                st.session_state.df = df
-                                st.session_state.uploaded_filename = "API Response"
-                                st.success("Data saved! View in Data Analysis or Dashboard")
-                        elif isinstance(json_response, dict):
-                            df = pd.DataFrame([json_response])
-                            st.dataframe(df, use_container_width=True)
-                    except:
-                        st.info("Response is not JSON or cannot be converted to DataFrame")
-                
-                with tab3:
-                    st.json(dict(response.headers))
+                    response, payload, cache_status = cached_request(
+                        get_session(), method, url, headers=headers, json_body=body, auth=auth, timeout=30,
+                        **http_cache_options
+                    )
+                store_response("rest_response", response, payload, cache_status)
                 
             except requests.exceptions.Timeout:
                 st.error("Request timed out", icon=":material/error:")
@@ -138,6 +283,52 @@ if api_type == "REST API":
                 st.error(f"Request failed: {str(e)}", icon=":material/error:")
             except json.JSONDecodeError as e:
                 st.error(f"Invalid JSON: {str(e)}", icon=":material/error:")
+    
+    if pagination != "None":
+        show_pagination_result("rest_pages", "API Response")
+    elif st.session_state.get("rest_response"):
+        result = st.session_state.rest_response
+        
+        # Display results
+        st.success(f"Response: {result['status']} · {result['size'] / 1024**2:.2f} MB · Cache: {result['cache']}",
+                   icon=":material/check_circle:")
+        
+        # Response tabs
+        tab1, tab2, tab3 = st.tabs([":material/code: Response", ":material/table_chart: Data View", ":material/info: Headers"])
+        
+        with tab1:
+            show_json_tree(result, "rest")
+        
+        with tab2:
+            if result["parsed"] is None:
+                st.info("Response is not JSON or cannot be converted to DataFrame")
+            else:
+                records_path = st.text_input(
+                    "Records path",
+                    key="rest_records_path",
+                    placeholder="data.items",
+                    help="Dotted path to the list of records; empty uses the response itself or its first list"
+                )
+                try:
+                    # Flattened once per records path and kept with the parsed response
+                    if records_path not in result["frames"]:
+                        result["frames"][records_path] = records_frame(result["parsed"], records_path)
+                    df = result["frames"][records_path]
+                except (KeyError, IndexError, ValueError, TypeError) as e:
+                    st.error(f"Could not read records: {str(e)}", icon=":material/error:")
+                    df = None
+                if df is not None:
+                    max_rows = int(get_preference("max_rows", 100))
+                    st.dataframe(df.head(max_rows), use_container_width=True)
+                    st.caption(f"Showing {min(len(df), max_rows):,} of {len(df):,} rows, {len(df.columns)} columns")
+                    
+                    # Option to save to session
+                    if st.button("Save to Session", key="save_api_data"):
+                        set_dataset(df, "API Response")
+                        st.success("Data saved! View in Data Analysis or Dashboard")
+        
+        with tab3:
+            st.json(result["headers"])
 
 elif api_type == "GraphQL":
     st.subheader("GraphQL Client")
@@ -173,9 +364,37 @@ elif api_type == "GraphQL":
             height=100
         )
     
+    with st.expander("Cursor Pagination (Optional)", expanded=False):
+        paginate_cursor = st.checkbox(
+            "Follow pageInfo.endCursor",
+            help="Re-run the query with the cursor variable set to endCursor until hasNextPage is false"
+        )
+        if paginate_cursor:
+            col1, col2 = st.columns(2)
+            with col1:
+                connection_path = st.text_input(
+                    "Connection path",
+                    value="data.users",
+                    help="Dotted path to the object holding nodes/edges and pageInfo"
+                )
+            with col2:
+                cursor_variable = st.text_input("Cursor variable", value="after",
+                                                help="Declared in the query, e.g. users(first: 100, after: $after)")
+            graphql_caps = pagination_caps("graphql")
+    
     if st.button(":material/send: Execute Query", type="primary", use_container_width=True):
         if not url or not query:
             st.error("Please enter both URL and query", icon=":material/error:")
+        elif paginate_cursor:
+            try:
+                headers = json.loads(headers_text) if headers_text else {}
+                vars_dict = json.loads(variables) if variables else {}
+                request = {"method": "POST", "url": url, "headers": headers,
+                           "json": {"query": query, "variables": vars_dict}}
+                options = {"connection_path": connection_path, "cursor_variable": cursor_variable}
+                run_pagination(request, "GraphQL cursor", options, graphql_caps, "graphql_pages")
+            except json.JSONDecodeError as e:
+                st.error(f"Invalid JSON: {str(e)}", icon=":material/error:")
         else:
             try:
                 headers = json.loads(headers_text) if headers_text else {}
@@ -187,19 +406,26 @@ elif api_type == "GraphQL":
                 }
                 
                 with st.spinner("Executing query..."):
-                    response = requests.post(url, json=payload, headers=headers, timeout=30)
-                
-                st.success(f"Response: {response.status_code}", icon=":material/check_circle:")
-                
-                json_response = response.json()
-                st.json(json_response)
+                    response, body, cache_status = cached_request(
+                        get_session(), "POST", url, headers=headers, json_body=payload, timeout=30,
+                        **http_cache_options
+                    )
+                store_response("graphql_response", response, body, cache_status)
                 
                 # Try to extract data
-                if "data" in json_response:
-                    st.session_state.api_data = json_response["data"]
+                parsed = st.session_state.graphql_response["parsed"]
+                if isinstance(parsed, dict) and "data" in parsed:
+                    st.session_state.api_data = parsed["data"]
                 
             except Exception as e:
                 st.error(f"Error: {str(e)}", icon=":material/error:")
+    
+    if paginate_cursor:
+        show_pagination_result("graphql_pages", "GraphQL Response")
+    elif st.session_state.get("graphql_response"):
+        result = st.session_state.graphql_response
+        st.success(f"Response: {result['status']} · Cache: {result['cache']}", icon=":material/check_circle:")
+        show_json_tree(result, "graphql")
 
 elif api_type == "Custom Request":
     st.subheader("Custom HTTP Request")
@@ -229,31 +455,246 @@ elif api_type == "Custom Request":
             body = json.loads(body_text) if body_text.strip() != '{}' else None
             
             with st.spinner("Sending..."):
-                response = requests.request(
+                response, payload, cache_status = cached_request(
+                    get_session(),
                     method=method,
                     url=url,
                     headers=headers,
                     params=params,
-                    json=body,
+                    json_body=body,
                     timeout=timeout,
-                    allow_redirects=allow_redirects
+                    allow_redirects=allow_redirects,
+                    **http_cache_options
                 )
-            
-            st.success(f"Status: {response.status_code}", icon=":material/check_circle:")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Status Code", response.status_code)
-            with col2:
-                st.metric("Response Time", f"{response.elapsed.total_seconds():.3f}s")
-            
-            try:
-                st.json(response.json())
-            except:
-                st.code(response.text)
+            store_response("custom_response", response, payload, cache_status)
                 
         except Exception as e:
             st.error(f"Error: {str(e)}", icon=":material/error:")
+    
+    if st.session_state.get("custom_response"):
+        result = st.session_state.custom_response
+        st.success(f"Status: {result['status']} · Cache: {result['cache']}", icon=":material/check_circle:")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Status Code", result["status"])
+        with col2:
+            st.metric("Response Time", f"{result['elapsed']:.3f}s")
+        
+        show_json_tree(result, "custom")
+
+elif api_type == "Batch Requests":
+    st.subheader("Batch Requests")
+    
+    st.markdown("""
+    Call one endpoint for many parameter values at once. Requests run concurrently over a shared keep-alive connection pool.
+    """)
+    
+    url_template = st.text_input(
+        "URL Template",
+        placeholder="https://jsonplaceholder.typicode.com/users/{id}",
+        help="Use {name} placeholders; each parameter row fills them in"
+    )
+    fields = template_fields(url_template)
+    
+    param_source = st.radio("Parameters from", ["List", "Dataset column"], horizontal=True)
+    rows = []
+    if param_source == "List":
+        params_text = st.text_area(
+            "Parameter values",
+            value="1\n2\n3",
+            height=150,
+            help="One value per line for a single placeholder, or one JSON object per line for several"
+        )
+        lines = [line.strip() for line in params_text.splitlines() if line.strip()]
+        try:
+            if len(fields) == 1:
+                rows = [{fields[0]: line} for line in lines]
+            else:
+                rows = [json.loads(line) for line in lines]
+        except json.JSONDecodeError as e:
+            st.error(f"Invalid JSON parameter line: {str(e)}", icon=":material/error:")
+    elif st.session_state.df is None:
+        st.info("Load a dataset in Data Analysis to use its columns as parameters", icon=":material/info:")
+    else:
+        df = st.session_state.df
+        field_cols = st.columns(max(len(fields), 1))
+        mapping = {}
+        for field_col, name in zip(field_cols, fields):
+            with field_col:
+                default = df.columns.tolist().index(name) if name in df.columns else 0
+                mapping[name] = st.selectbox(f"Column for {{{name}}}", df.columns.tolist(), index=default)
+        if mapping:
+            # Each distinct combination is requested once
+            unique = df[list(mapping.values())].drop_duplicates()
+            rows = [dict(zip(mapping, values)) for values in unique.itertuples(index=False)]
+    
+    with st.expander("Headers (Optional)", expanded=False):
+        batch_headers_text = st.text_area("Headers as JSON", value='{}', height=100, key="batch_headers")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        concurrency = st.number_input("Concurrency", min_value=1, max_value=64, value=DEFAULT_CONCURRENCY)
+    with col2:
+        rate_limit = st.number_input("Rate limit (req/s per host)", min_value=0.0, max_value=1000.0, value=0.0,
+                                     help="0 means unlimited")
+    with col3:
+        retries = st.number_input("Retries", min_value=0, max_value=10, value=DEFAULT_RETRIES,
+                                  help="Retried on connection errors, 429 and 5xx with exponential backoff")
+    with col4:
+        backoff = st.number_input("Backoff factor (s)", min_value=0.0, max_value=10.0, value=DEFAULT_BACKOFF)
+    
+    st.caption(f"{len(rows)} request(s) will be sent")
+    
+    if st.button(":material/send: Run Batch", type="primary", use_container_width=True):
+        if not url_template or not fields:
+            st.error("Please enter a URL template with at least one {placeholder}", icon=":material/error:")
+        elif not rows:
+            st.error("Please provide at least one parameter value", icon=":material/error:")
+        elif len(rows) > MAX_BATCH_REQUESTS:
+            st.error(f"At most {MAX_BATCH_REQUESTS:,} requests per batch", icon=":material/error:")
+        else:
+            try:
+                jobs = expand_template(url_template, rows)
+                batch_headers = json.loads(batch_headers_text) if batch_headers_text else {}
+                progress_bar = st.progress(0.0, text="Sending requests...")
+                started = time.perf_counter()
+                results = run_batch(
+                    jobs,
+                    headers=batch_headers,
+                    concurrency=concurrency,
+                    rate_per_host=rate_limit,
+                    retries=retries,
+                    backoff=backoff,
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"{done}/{total} requests")
+                )
+                wall_time = time.perf_counter() - started
+                progress_bar.empty()
+                st.session_state.batch_result = {
+                    "results": results,
+                    "frame": batch_frame(results),
+                    "stats": latency_stats(results, wall_time),
+                }
+            except (ValueError, json.JSONDecodeError) as e:
+                st.error(f"Error: {str(e)}", icon=":material/error:")
+    
+    # Results live in the session so the save button survives its own rerun
+    batch = st.session_state.get("batch_result")
+    if batch:
+        stats = batch["stats"]
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Succeeded", f"{stats['succeeded']}/{stats['requests']}")
+        col2.metric("p50 latency", f"{stats['p50_ms']:.0f} ms")
+        col3.metric("p95 latency", f"{stats['p95_ms']:.0f} ms")
+        col4.metric("Throughput", f"{stats['throughput']:.1f} req/s")
+        col5.metric("Retries", stats["retries"])
+        
+        failures = [r for r in batch["results"] if r.error is not None]
+        if failures:
+            with st.expander(f"{len(failures)} failed request(s)"):
+                st.dataframe(
+                    pd.DataFrame([{"URL": r.url, "Status": r.status, "Error": r.error, "Elapsed (ms)": r.latency * 1000}
+                                  for r in failures]),
+                    use_container_width=True, hide_index=True
+                )
+        
+        if batch["frame"].empty:
+            st.info("No data returned", icon=":material/info:")
+        else:
+            st.dataframe(batch["frame"], use_container_width=True)
+            if st.button("Save to Session", key="save_batch_data"):
+                set_dataset(batch["frame"], "API Batch")
+                st.success("Data saved! View in Data Analysis or Dashboard")
+
+elif api_type == "Polling":
+    st.subheader("Polling")
+    
+    st.markdown("""
+    Fetch an endpoint on a fixed interval in the background. New records are appended to a rolling buffer
+    that the Dashboard can chart live; with a key column, records already in the buffer are skipped.
+    """)
+    
+    poll_url = st.text_input("URL", placeholder="https://api.example.com/metrics", key="poll_url")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        poll_records_path = st.text_input(
+            "Records path",
+            placeholder="data.items",
+            key="poll_records_path",
+            help="Dotted path to the list of records; empty uses the response itself or its first list"
+        )
+    with col2:
+        poll_key = st.text_input(
+            "Key column (Optional)",
+            placeholder="id",
+            key="poll_key",
+            help="Records whose key is already in the buffer are not added again"
+        )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        poll_interval = st.number_input("Interval (seconds)", min_value=MIN_INTERVAL, max_value=3600,
+                                        value=DEFAULT_INTERVAL)
+    with col2:
+        poll_capacity = st.number_input("Buffer size (rows)", min_value=100, max_value=MAX_CAPACITY,
+                                        value=DEFAULT_CAPACITY, step=1000,
+                                        help="Once full, the oldest rows are overwritten")
+    
+    with st.expander("Headers (Optional)", expanded=False):
+        poll_headers_text = st.text_area("Headers as JSON", value='{}', height=100, key="poll_headers")
+    
+    poller = st.session_state.get("poller")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button(":material/play_arrow: Start Polling", type="primary", use_container_width=True):
+            if not poll_url:
+                st.error("Please enter a URL", icon=":material/error:")
+            else:
+                try:
+                    poll_headers = json.loads(poll_headers_text) if poll_headers_text else {}
+                    if poller is not None:
+                        poller.stop()
+                    poller = Poller(
+                        get_session(),
+                        {"method": "GET", "url": poll_url, "headers": poll_headers},
+                        interval=poll_interval,
+                        records_path=poll_records_path,
+                        key=poll_key.strip(),
+                        capacity=poll_capacity
+                    )
+                    poller.start()
+                    st.session_state.poller = poller
+                except json.JSONDecodeError as e:
+                    st.error(f"Invalid JSON: {str(e)}", icon=":material/error:")
+    with col2:
+        if st.button(":material/stop: Stop Polling", use_container_width=True, disabled=poller is None):
+            poller.stop()
+    
+    if poller is not None:
+        @st.fragment(run_every=poller.interval if poller.running else None)
+        def polling_status():
+            stats = poller.stats
+            buffer = poller.buffer
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Status", "Running" if poller.running else "Stopped")
+            col2.metric("Buffered rows", f"{buffer.rows:,}/{buffer.capacity:,}")
+            col3.metric("New rows", f"{stats['added']:,}", help=f"{stats['duplicates']:,} duplicates skipped")
+            col4.metric("Errors", stats["errors"])
+            if stats["last_error"]:
+                st.error(f"Last poll failed: {stats['last_error']}", icon=":material/error:")
+            if stats["last_poll"] is not None:
+                st.caption(f"{stats['polls']:,} polls · last at {stats['last_poll']:%H:%M:%S} · "
+                           f"{poller.request['url']} every {poller.interval:g}s")
+            if buffer.rows:
+                st.dataframe(buffer.to_frame(last=10), use_container_width=True, hide_index=True)
+                st.caption("Newest 10 rows. Chart the whole buffer live from the Dashboard.")
+        
+        polling_status()
+        
+        if st.button("Save to Session", key="save_poll_data", disabled=not poller.buffer.rows):
+            set_dataset(poller.buffer.to_frame(), "API Polling")
+            st.success("Data saved! View in Data Analysis or Dashboard")
 
 st.divider()
 
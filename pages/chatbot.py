@@ -1,7 +1,31 @@
 import streamlit as st
+import json
 import time
 import pandas as pd
 
+from utils.context import CONTEXT_TOKEN_BUDGET, data_context, estimate_tokens
+from utils.dataset import dataset_version
+from utils.history import (
+    HISTORY_TOKEN_BUDGET,
+    message_tokens,
+    reset_history,
+    summary_prompt,
+    windowed_history,
+)
+from utils.llm import add_usage, anthropic_system, anthropic_usage, client_for, openai_usage, record_usage
+from utils.preferences import get_preference
+from utils.query import TOOL_NAME, anthropic_tool, execute_tool, openai_tool
+from utils.response_cache import (
+    DEFAULT_MAX_MB,
+    DEFAULT_TTL_HOURS,
+    SIMILARITY_THRESHOLD,
+    ResponseCache,
+    get_response_cache,
+    replay,
+)
+
+MAX_TOOL_ROUNDS = 5
+
 st.title(":material/chat: AI Chatbot")
 
 # Check if data is available
@@ -41,8 +65,23 @@ else:
 # Clear chat button
 if st.button(":material/delete: Clear Chat", use_container_width=False):
     st.session_state.messages = []
+    reset_history()
     st.rerun()
 
+with st.sidebar:
+    prompt_caching = st.toggle(
+        "Prompt caching",
+        value=True,
+        key="prompt_caching",
+        help="Send the data context as a stable system prefix so providers can reuse it across turns"
+    )
+    use_tools = has_data and st.toggle(
+        "Query tool",
+        value=True,
+        key="query_tool",
+        help="Let the model run filters, group-bys and aggregates on the full dataset locally for exact answers"
+    )
+
 # Show data-aware info
 if has_data:
     st.info(f"""
@@ -69,49 +108,11 @@ for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
-def prepare_data_context() -> str:
-    """Prepare a context summary of the uploaded data."""
-    if st.session_state.df is None:
-        return ""
-    
-    df = st.session_state.df
-    
-    # Basic info
-    context = f"\n\n--- UPLOADED DATA CONTEXT ---\n"
-    context += f"File: {st.session_state.uploaded_filename}\n"
-    context += f"Rows: {len(df)}, Columns: {len(df.columns)}\n\n"
-    
-    # Column information
-    context += "Columns:\n"
-    for col in df.columns:
-        dtype = df[col].dtype
-        null_count = df[col].isnull().sum()
-        if dtype in ['int64', 'float64']:
-            context += f"- {col} ({dtype}): min={df[col].min():.2f}, max={df[col].max():.2f}, mean={df[col].mean():.2f}, null={null_count}\n"
-        else:
-            unique_count = df[col].nunique()
-            context += f"- {col} ({dtype}): {unique_count} unique values, null={null_count}\n"
-    
-    # Sample data (first 3 rows)
-    context += f"\nFirst 3 rows:\n{df.head(3).to_string()}\n"
-    
-    # Summary statistics for numeric columns
-    numeric_cols = df.select_dtypes(include=['number']).columns
-    if len(numeric_cols) > 0:
-        context += f"\nNumeric Summary:\n{df[numeric_cols].describe().to_string()}\n"
-    
-    context += "--- END DATA CONTEXT ---\n\n"
-    
-    return context
-
-
-# LLM API functions with caching
-@st.cache_data(show_spinner=False)
+# LLM API functions
 def call_openai(messages_list: list, model_name: str) -> str:
-    """Call OpenAI API with caching."""
+    """Call OpenAI API and return the full reply."""
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", ""))
+        client = client_for("OpenAI")
         
         response = client.chat.completions.create(
             model=model_name,
@@ -121,12 +122,10 @@ def call_openai(messages_list: list, model_name: str) -> str:
     except Exception as e:
         return f"Error calling OpenAI API: {str(e)}"
 
-@st.cache_data(show_spinner=False)
 def call_anthropic(messages_list: list, model_name: str) -> str:
-    """Call Anthropic API with caching."""
+    """Call Anthropic API and return the full reply."""
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=st.secrets.get("ANTHROPIC_API_KEY", ""))
+        client = client_for("Anthropic")
         
         response = client.messages.create(
             model=model_name,
@@ -137,40 +136,135 @@ def call_anthropic(messages_list: list, model_name: str) -> str:
     except Exception as e:
         return f"Error calling Anthropic API: {str(e)}"
 
-def stream_openai_response(messages_list: list, model_name: str):
-    """Stream OpenAI responses in real-time."""
+def stream_openai_response(messages_list: list, model_name: str, usage: dict = None, status: dict = None):
+    """Stream OpenAI responses in real-time, filling ``usage`` from the final chunk.
+
+    ``status["complete"]`` is set once the whole answer has arrived; a stream cut short
+    by an error ends with an "Error:" piece instead.
+    """
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", ""))
+        client = client_for("OpenAI")
         
         stream = client.chat.completions.create(
             model=model_name,
             messages=messages_list,
-            stream=True
+            stream=True,
+            stream_options={"include_usage": True}
         )
         
         for chunk in stream:
-            if chunk.choices[0].delta.content:
+            # The usage chunk arrives last and carries no choices
+            if chunk.usage is not None and usage is not None:
+                usage.update(openai_usage(chunk.usage))
+            if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
+        if status is not None:
+            status["complete"] = True
     except Exception as e:
         yield f"Error: {str(e)}"
 
-def stream_anthropic_response(messages_list: list, model_name: str):
-    """Stream Anthropic responses in real-time."""
+def stream_anthropic_response(messages_list: list, model_name: str, system: list = None, usage: dict = None,
+                              status: dict = None):
+    """Stream Anthropic responses in real-time, filling ``usage`` once the message completes.
+
+    ``status["complete"]`` is set as for :func:`stream_openai_response`.
+    """
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=st.secrets.get("ANTHROPIC_API_KEY", ""))
+        client = client_for("Anthropic")
         
+        extra = {"system": system} if system else {}
         with client.messages.stream(
             model=model_name,
             max_tokens=4096,
-            messages=messages_list
+            messages=messages_list,
+            **extra
         ) as stream:
             for text in stream.text_stream:
                 yield text
+            if usage is not None:
+                usage.update(anthropic_usage(stream.get_final_message().usage))
+        if status is not None:
+            status["complete"] = True
     except Exception as e:
         yield f"Error: {str(e)}"
 
+def answer_openai_with_tools(messages_list: list, model_name: str, usage: dict, queries: list,
+                             status: dict) -> str:
+    """Let OpenAI call the local query tool until it answers; each query is recorded in ``queries``."""
+    try:
+        client = client_for("OpenAI")
+        messages = list(messages_list)
+        for round_number in range(MAX_TOOL_ROUNDS + 1):
+            # The history holds tool calls, so the tool stays declared; the last round just can't use it
+            last_round = round_number == MAX_TOOL_ROUNDS
+            response = client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                tools=[openai_tool()],
+                tool_choice="none" if last_round else "auto"
+            )
+            add_usage(usage, openai_usage(response.usage))
+            message = response.choices[0].message
+            if not message.tool_calls or last_round:
+                status["complete"] = True
+                return message.content or ""
+            messages.append({
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": [call.model_dump() for call in message.tool_calls]
+            })
+            for call in message.tool_calls:
+                result_text, result = execute_tool(st.session_state.df, call.function.arguments)
+                queries.append((call.function.arguments, result_text, result))
+                messages.append({"role": "tool", "tool_call_id": call.id, "content": result_text})
+        return ""
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def answer_anthropic_with_tools(messages_list: list, model_name: str, system: list, usage: dict, queries: list,
+                                status: dict) -> str:
+    """Let Anthropic call the local query tool until it answers; each query is recorded in ``queries``."""
+    try:
+        client = client_for("Anthropic")
+        messages = list(messages_list)
+        extra = {"system": system} if system else {}
+        for round_number in range(MAX_TOOL_ROUNDS + 1):
+            # The history holds tool_use blocks, so the tool stays declared; the last round just can't use it
+            last_round = round_number == MAX_TOOL_ROUNDS
+            response = client.messages.create(
+                model=model_name,
+                max_tokens=4096,
+                messages=messages,
+                tools=[anthropic_tool()],
+                tool_choice={"type": "none" if last_round else "auto"},
+                **extra
+            )
+            add_usage(usage, anthropic_usage(response.usage))
+            if response.stop_reason != "tool_use" or last_round:
+                status["complete"] = True
+                return "".join(block.text for block in response.content if block.type == "text")
+            messages.append({"role": "assistant", "content": [block.model_dump(exclude_none=True) for block in response.content]})
+            results = []
+            for block in response.content:
+                if block.type == "tool_use":
+                    result_text, result = execute_tool(st.session_state.df, block.input)
+                    queries.append((json.dumps(block.input), result_text, result))
+                    results.append({"type": "tool_result", "tool_use_id": block.id, "content": result_text})
+            messages.append({"role": "user", "content": results})
+        return ""
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def summarize_turns(previous: str, turns: list):
+    """Fold older turns into the rolling summary with the current model; None if the call fails."""
+    request = [{"role": "user", "content": summary_prompt(previous, turns)}]
+    with st.spinner("Summarizing earlier messages..."):
+        if provider == "OpenAI":
+            summary = call_openai(request, model)
+        else:
+            summary = call_anthropic(request, model)
+    return None if summary.startswith("Error calling") else summary
+
 # Chat input
 if prompt := st.chat_input("Your message"):
     # Check for API keys
@@ -190,41 +284,94 @@ if prompt := st.chat_input("Your message"):
     api_messages = []
     
     # Add system message with data context if available
-    data_context = ""
     if has_data:
-        data_context = prepare_data_context()
+        context_text = data_context(get_preference("context_tokens", CONTEXT_TOKEN_BUDGET))
         system_content = f"""You are a helpful AI assistant with access to the user's uploaded data. 
 Use the data context below to answer questions accurately.
 
-{data_context}
+{context_text}
 
 When answering questions about the data:
 - Reference specific columns, values, and statistics
 - Provide precise numerical answers when possible
 - Suggest relevant analyses or visualizations
 - If the question isn't about the data, answer normally"""
+        if use_tools:
+            system_content += f"""
+
+Call the {TOOL_NAME} tool to compute exact counts, aggregates, top values and lookups on the full table instead of estimating from the summary above."""
         
         if provider == "OpenAI":
-            # OpenAI supports system messages
+            # OpenAI supports system messages; an unchanged prefix is cached automatically
             api_messages.append({"role": "system", "content": system_content})
     
-    # Add conversation history
-    for i, m in enumerate(st.session_state.messages):
-        # For Anthropic, prepend data context to first user message only
-        if provider == "Anthropic" and has_data and i == 0 and m["role"] == "user":
+    # Add conversation history, windowed to the token budget
+    history = windowed_history(
+        st.session_state.messages,
+        get_preference("history_tokens", HISTORY_TOKEN_BUDGET),
+        summarize_turns
+    )
+    for i, m in enumerate(history):
+        # Without prompt caching, Anthropic gets the data context on the first user message
+        if provider == "Anthropic" and has_data and not prompt_caching and i == 0:
             api_messages.append({
                 "role": m["role"], 
                 "content": f"{system_content}\n\n{m['content']}"
             })
         else:
-            api_messages.append({"role": m["role"], "content": m["content"]})
+            api_messages.append(m)
+    
+    system = anthropic_system(system_content) if provider == "Anthropic" and has_data and prompt_caching else None
+    st.session_state.prompt_tokens = sum(message_tokens(m) for m in api_messages) + (
+        estimate_tokens(system_content) if system else 0
+    )
+    
+    # Identical (or, if enabled, near-identical) questions on the same data and history are replayed
+    cache_mode = get_preference("response_cache", "Exact match")
+    cached = None
+    if cache_mode != "Off":
+        response_cache = get_response_cache()
+        cache_scope = ResponseCache.scope(model, dataset_version(), history[:-1], use_tools)
+        cached = response_cache.get(
+            cache_scope,
+            prompt,
+            get_preference("response_cache_ttl_hours", DEFAULT_TTL_HOURS) * 3600,
+            SIMILARITY_THRESHOLD if cache_mode == "Exact + similar" else None
+        )
     
     # Get and display assistant response with streaming
+    usage = {}
+    # Only answers that finished without an error are cached
+    status = {"complete": False}
     with st.chat_message("assistant"):
-        if provider == "OpenAI":
-            response = st.write_stream(stream_openai_response(api_messages, model))
+        if cached is not None:
+            response = st.write_stream(replay(cached[0]))
+            match = "" if cached[1] == 1.0 else f" (similar question, {cached[1]:.0%} match)"
+            st.caption(f"Answered from cache{match}")
+        elif use_tools:
+            queries = []
+            with st.spinner("Querying data..."):
+                if provider == "OpenAI":
+                    answer = answer_openai_with_tools(api_messages, model, usage, queries, status)
+                else:
+                    answer = answer_anthropic_with_tools(api_messages, model, system, usage, queries, status)
+            for arguments, result_text, result in queries:
+                with st.expander(f":material/database_search: {TOOL_NAME}", expanded=False):
+                    st.code(arguments, language="json")
+                    if result is None:
+                        st.caption(result_text)
+                    else:
+                        st.dataframe(result, use_container_width=True, hide_index=True)
+            response = st.write_stream(replay(answer))
+        elif provider == "OpenAI":
+            response = st.write_stream(stream_openai_response(api_messages, model, usage, status))
         else:
-            response = st.write_stream(stream_anthropic_response(api_messages, model))
+            response = st.write_stream(stream_anthropic_response(api_messages, model, system, usage, status))
+    if usage:
+        record_usage(usage)
+    if cache_mode != "Off" and cached is None and status["complete"]:
+        response_cache.put(cache_scope, prompt, response,
+                           get_preference("response_cache_mb", DEFAULT_MAX_MB) * 1024**2)
     
     st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -234,6 +381,10 @@ with st.sidebar:
     st.metric("Messages", len(st.session_state.messages))
     st.metric("Current Provider", provider)
     st.metric("Current Model", model)
+    if st.session_state.get("prompt_tokens"):
+        summary = st.session_state.get("chat_summary") or {}
+        st.metric("Prompt Size", f"~{st.session_state.prompt_tokens:,} tokens",
+                  help=f"{summary.get('upto', 0)} older messages are carried as a summary")
     
     if has_data:
         st.divider()
@@ -243,6 +394,10 @@ with st.sidebar:
         st.metric("Dataset", st.session_state.uploaded_filename)
         st.metric("Rows", len(df))
         st.metric("Columns", len(df.columns))
+        context_budget = get_preference("context_tokens", CONTEXT_TOKEN_BUDGET)
+        context_tokens = estimate_tokens(data_context(context_budget))
+        st.metric("Context Size", f"~{context_tokens:,} tokens",
+                  help=f"Budget: {context_budget:,} tokens (change it in Settings)")
         
         with st.expander("View Data Summary"):
             st.caption("Chatbot has access to:")
@@ -251,6 +406,29 @@ with st.sidebar:
         st.divider()
         st.info("Upload data in Data Analysis to enable chat", icon=":material/info:")
     
+    chat_usage = st.session_state.get("chat_usage")
+    if chat_usage and chat_usage["last"]:
+        st.divider()
+        st.subheader(":material/bolt: Prompt Cache")
+        last = chat_usage["last"]
+        st.metric("Cached input tokens (last)", f"{last['cached_tokens']:,} / {last['input_tokens']:,}")
+        if last["cache_write_tokens"]:
+            st.caption(f"{last['cache_write_tokens']:,} tokens written to the cache")
+        hit_rate = chat_usage["cached_tokens"] / chat_usage["input_tokens"] if chat_usage["input_tokens"] else 0
+        st.metric("Session cache hit rate", f"{hit_rate:.0%}")
+    
+    if get_preference("response_cache", "Exact match") != "Off":
+        st.divider()
+        st.subheader(":material/cached: Response Cache")
+        cache_stats = get_response_cache().stats()
+        st.metric("Cached answers", f"{cache_stats['entries']:,}",
+                  help=f"{cache_stats['bytes'] / 1024**2:.2f} MB on disk")
+        st.caption(f"{cache_stats['hits']} exact and {cache_stats['similar_hits']} similar hits, "
+                   f"{cache_stats['misses']} misses")
+        if st.button("Clear response cache"):
+            get_response_cache().clear()
+            st.rerun()
+    
     if st.session_state.messages:
         st.divider()
         user_msgs = sum(1 for m in st.session_state.messages if m["role"] == "user")
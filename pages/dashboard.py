@@ -1,10 +1,74 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from utils.charts import (
+    AGGREGATES,
+    CORR_ANNOTATION_MAX,
+    CORR_SAMPLE_ROWS,
+    RESAMPLE_FREQUENCIES,
+    DEFAULT_POINT_BUDGET,
+    aggregate,
+    aggregate_column,
+    auto_frequency,
+    box_stats,
+    correlation_matrix,
+    density_grid,
+    downsample_line,
+    histogram,
+    is_datetime_like,
+    resample_series,
+    sample_scatter,
+    strongest_pairs,
+    time_span,
+)
+from utils.dataset import dataset_version
+from utils.polling import POLLED_AT
+from utils.profile import column_profile
+
 st.title(":material/bar_chart: Interactive Dashboard")
 
+poller = st.session_state.get("poller")
+if poller is not None:
+    @st.fragment(run_every=poller.interval if poller.running else None)
+    def live_feed():
+        buffer = poller.buffer
+        st.subheader(":material/sensors: Live API Feed")
+        status = "polling" if poller.running else "stopped"
+        st.caption(f"{poller.request['url']} every {poller.interval:g}s · {status} · "
+                   f"{buffer.rows:,}/{buffer.capacity:,} rows buffered")
+        if not buffer.rows:
+            st.info("Waiting for the first records...", icon=":material/hourglass_empty:")
+            return
+        
+        value_cols = [c for c in buffer.numeric_columns() if c != buffer.key]
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            x_options = [POLLED_AT] + [c for c in buffer.columns if c != POLLED_AT]
+            x_col = st.selectbox("X-axis", x_options, key="live_x")
+        with col2:
+            y_cols = st.multiselect("Y-axis", value_cols, default=value_cols[:1], key="live_y")
+        with col3:
+            window = st.number_input("Last N rows", min_value=10, max_value=buffer.capacity,
+                                     value=min(1000, buffer.capacity), step=100, key="live_window")
+        if not y_cols:
+            st.info("Select at least one numeric column to chart", icon=":material/info:")
+            return
+        
+        # The buffer hands out views of its newest rows; only the figure takes a copy
+        fig = go.Figure()
+        with buffer.lock:
+            columns = buffer.window([x_col] + y_cols, last=window)
+            for y_col in y_cols:
+                fig.add_trace(go.Scatter(x=columns[x_col], y=columns[y_col], mode="lines", name=y_col))
+        fig.update_layout(margin=dict(t=20, l=0, r=0, b=0), xaxis_title=x_col, height=350)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    live_feed()
+    st.divider()
+
 if st.session_state.df is not None:
     df = st.session_state.df
     
@@ -12,29 +76,50 @@ if st.session_state.df is not None:
     
     # Get numeric and categorical columns
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+    
+    version = dataset_version()
     
     # Chart type selector
-    chart_type = st.selectbox(
-        "Select Chart Type",
-        ["Bar Chart", "Line Chart", "Scatter Plot", "Box Plot", "Histogram", "Pie Chart", "Heatmap"]
-    )
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        chart_type = st.selectbox(
+            "Select Chart Type",
+            ["Bar Chart", "Line Chart", "Scatter Plot", "Box Plot", "Histogram", "Pie Chart", "Heatmap"]
+        )
+    with col2:
+        point_budget = st.number_input(
+            "Max points per chart",
+            min_value=1000,
+            max_value=1_000_000,
+            value=DEFAULT_POINT_BUDGET,
+            step=1000,
+            help="Line and scatter charts with more points are reduced on the server before rendering"
+        )
     
     st.divider()
     
     if chart_type == "Bar Chart":
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             x_col = st.selectbox("X-axis", df.columns.tolist(), key="bar_x")
         with col2:
             y_col = st.selectbox("Y-axis", numeric_cols, key="bar_y") if numeric_cols else st.selectbox("Y-axis", df.columns.tolist())
         with col3:
+            agg = st.selectbox("Aggregate", AGGREGATES, key="bar_agg") if y_col in numeric_cols else "count"
+        with col4:
             color_col = st.selectbox("Color by", ["None"] + categorical_cols, key="bar_color")
         
-        if color_col == "None":
-            fig = px.bar(df, x=x_col, y=y_col, title=f"{y_col} by {x_col}")
+        # One bar (segment) per group instead of one per row
+        by = (x_col,) if color_col in ("None", x_col) else (x_col, color_col)
+        bar_data = aggregate(df, version, by, y_col, agg)
+        value_col = aggregate_column(by, y_col, agg)
+        title = f"{agg.title()} of {y_col} by {x_col}"
+        
+        if len(by) == 1:
+            fig = px.bar(bar_data, x=x_col, y=value_col, title=title)
         else:
-            fig = px.bar(df, x=x_col, y=y_col, color=color_col, title=f"{y_col} by {x_col}")
+            fig = px.bar(bar_data, x=x_col, y=value_col, color=color_col, title=title)
         
         fig.update_layout(margin=dict(t=40, l=0, r=0, b=0))
         st.plotly_chart(fig, use_container_width=True)
@@ -48,14 +133,50 @@ if st.session_state.df is not None:
         with col3:
             color_col = st.selectbox("Color by", ["None"] + categorical_cols, key="line_color")
         
+        time_series = False
+        if is_datetime_like(df[x_col]):
+            time_series = st.toggle("Time-series mode", value=True, key="line_resample",
+                                    help="Aggregate values into fixed time buckets instead of plotting raw rows")
+        
+        if time_series:
+            col1, col2 = st.columns(2)
+            with col1:
+                frequency = st.selectbox("Frequency", ["Auto"] + list(RESAMPLE_FREQUENCIES), key="line_freq")
+            with col2:
+                agg = st.selectbox("Aggregate", AGGREGATES, index=1, key="line_agg")
+            if frequency == "Auto":
+                frequency = auto_frequency(*time_span(df, version, x_col), point_budget)
+        else:
+            downsample_method = st.radio(
+                "Downsampling",
+                ["LTTB", "Min/Max per bucket"],
+                horizontal=True,
+                help="LTTB keeps the visual shape; min/max keeps every peak and trough"
+            )
+        
         if y_cols:
+            series_cols = tuple(y_cols) if color_col == "None" else (y_cols[0],)
+            split_col = None if color_col == "None" else color_col
+            if time_series:
+                line_df = resample_series(df, version, x_col, series_cols, split_col, frequency, agg)
+            else:
+                line_df, total_points = downsample_line(
+                    df, version, x_col, series_cols, split_col,
+                    point_budget, downsample_method
+                )
+            
             if color_col == "None":
-                fig = px.line(df, x=x_col, y=y_cols, title="Line Chart")
+                fig = px.line(line_df, x=x_col, y=y_cols, title="Line Chart")
             else:
-                fig = px.line(df, x=x_col, y=y_cols[0], color=color_col, title="Line Chart")
+                fig = px.line(line_df, x=x_col, y=y_cols[0], color=color_col, title="Line Chart")
             
             fig.update_layout(margin=dict(t=40, l=0, r=0, b=0))
             st.plotly_chart(fig, use_container_width=True)
+            shown_points = int(line_df[list(series_cols)].notna().sum().sum())
+            if time_series:
+                st.caption(f"{agg.title()} per {frequency.lower()}: {shown_points:,} points from {len(df):,} rows")
+            else:
+                st.caption(f"Showing {shown_points:,} of {total_points:,} points")
     
     elif chart_type == "Scatter Plot":
         col1, col2, col3, col4 = st.columns(4)
@@ -68,15 +189,35 @@ if st.session_state.df is not None:
         with col4:
             size_col = st.selectbox("Size by", ["None"] + numeric_cols, key="scatter_size")
         
+        scatter_mode = st.radio(
+            "Above the point budget",
+            ["Stratified sample", "Density heatmap"],
+            horizontal=True,
+            help="Sampling keeps at least one point per color group or region; density bins every point"
+        )
+        
         kwargs = {"x": x_col, "y": y_col, "title": f"{y_col} vs {x_col}"}
         if color_col != "None":
             kwargs["color"] = color_col
         if size_col != "None":
             kwargs["size"] = size_col
         
-        fig = px.scatter(df, **kwargs)
+        numeric_xy = x_col in numeric_cols and y_col in numeric_cols
+        if scatter_mode == "Density heatmap" and numeric_xy and len(df) > point_budget:
+            counts, x_centers, y_centers, total_points = density_grid(df, version, x_col, y_col)
+            fig = go.Figure(data=go.Heatmap(z=counts, x=x_centers, y=y_centers, colorscale="Viridis"))
+            fig.update_layout(title=kwargs["title"], xaxis_title=x_col, yaxis_title=y_col)
+            caption = f"Density of all {total_points:,} points in {counts.size:,} bins"
+        else:
+            scatter_df, total_points = sample_scatter(
+                df, version, x_col, y_col,
+                kwargs.get("color"), kwargs.get("size"), point_budget
+            )
+            fig = px.scatter(scatter_df, **kwargs)
+            caption = f"Showing {len(scatter_df):,} of {total_points:,} points"
         fig.update_layout(margin=dict(t=40, l=0, r=0, b=0))
         st.plotly_chart(fig, use_container_width=True)
+        st.caption(caption)
     
     elif chart_type == "Box Plot":
         col1, col2, col3 = st.columns(3)
@@ -87,15 +228,35 @@ if st.session_state.df is not None:
         with col3:
             color_col = st.selectbox("Color by", ["None"] + categorical_cols, key="box_color")
         
-        kwargs = {"y": y_col, "title": f"Distribution of {y_col}"}
-        if x_col != "None":
-            kwargs["x"] = x_col
-        if color_col != "None":
-            kwargs["color"] = color_col
+        # Quartiles and whiskers are computed here; only five numbers per box are sent
+        group_col = None if x_col == "None" else x_col
+        split_col = None if color_col in ("None", x_col) else color_col
+        by = tuple(c for c in (group_col, split_col) if c)
+        try:
+            stats = box_stats(df, version, y_col, by)
+        except ValueError as e:
+            st.warning(f"Box plots need a numeric value column: {str(e)}")
+            stats = None
         
-        fig = px.box(df, **kwargs)
-        fig.update_layout(margin=dict(t=40, l=0, r=0, b=0))
-        st.plotly_chart(fig, use_container_width=True)
+        if stats is not None:
+            fig = go.Figure()
+            traces = stats.groupby(split_col, observed=True, sort=False) if split_col else [(None, stats)]
+            for name, trace in traces:
+                fig.add_trace(go.Box(
+                    x=trace[group_col].astype(str) if group_col else [y_col] * len(trace),
+                    q1=trace["q1"], median=trace["median"], q3=trace["q3"],
+                    lowerfence=trace["lowerfence"], upperfence=trace["upperfence"],
+                    name=str(name) if split_col else y_col,
+                    showlegend=split_col is not None,
+                ))
+            fig.update_layout(
+                title=f"Distribution of {y_col}",
+                boxmode="group" if split_col else "overlay",
+                xaxis_title=group_col,
+                yaxis_title=y_col,
+                margin=dict(t=40, l=0, r=0, b=0)
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     elif chart_type == "Histogram":
         col1, col2, col3 = st.columns(3)
@@ -106,12 +267,30 @@ if st.session_state.df is not None:
         with col3:
             color_col = st.selectbox("Color by", ["None"] + categorical_cols, key="hist_color")
         
-        kwargs = {"x": x_col, "nbins": bins, "title": f"Distribution of {x_col}"}
-        if color_col != "None":
-            kwargs["color"] = color_col
+        split_col = None if color_col == "None" else color_col
+        is_dates = pd.api.types.is_datetime64_any_dtype(df[x_col])
         
-        fig = px.histogram(df, **kwargs)
-        fig.update_layout(margin=dict(t=40, l=0, r=0, b=0))
+        if pd.api.types.is_numeric_dtype(df[x_col]) or is_dates:
+            # Binned here from cached sorted values; only edges and counts are sent
+            edges, group_counts = histogram(df, version, x_col, bins, split_col)
+            centers = (edges[:-1] + edges[1:]) / 2
+            widths = np.diff(edges)
+            if is_dates:
+                centers = pd.to_datetime(centers.astype("int64"))
+                widths = widths / 1e6  # Plotly date axes measure bar width in milliseconds
+            fig = go.Figure()
+            for name, counts in group_counts:
+                fig.add_trace(go.Bar(
+                    x=centers, y=counts, width=widths,
+                    name=str(name) if split_col else x_col,
+                    showlegend=split_col is not None,
+                ))
+            fig.update_layout(barmode="stack", bargap=0, xaxis_title=x_col, yaxis_title="count")
+        else:
+            by = (x_col,) if split_col in (None, x_col) else (x_col, split_col)
+            fig = px.bar(aggregate(df, version, by, None, "count"), x=x_col, y=aggregate_column(by, None, "count"),
+                         color=None if len(by) == 1 else split_col)
+        fig.update_layout(title=f"Distribution of {x_col}", margin=dict(t=40, l=0, r=0, b=0))
         st.plotly_chart(fig, use_container_width=True)
     
     elif chart_type == "Pie Chart":
@@ -123,11 +302,13 @@ if st.session_state.df is not None:
                 values_col = st.selectbox("Values", ["Count"] + numeric_cols, key="pie_values")
             
             if values_col == "Count":
-                pie_data = df[names_col].value_counts().reset_index()
-                pie_data.columns = [names_col, 'count']
-                fig = px.pie(pie_data, names=names_col, values='count', title=f"Distribution of {names_col}")
+                pie_data = aggregate(df, version, (names_col,), None, "count")
+                fig = px.pie(pie_data, names=names_col, values=aggregate_column((names_col,), None, "count"),
+                             title=f"Distribution of {names_col}")
             else:
-                fig = px.pie(df, names=names_col, values=values_col, title=f"{values_col} by {names_col}")
+                agg = st.radio("Aggregate", AGGREGATES, horizontal=True, key="pie_agg")
+                pie_data = aggregate(df, version, (names_col,), values_col, agg)
+                fig = px.pie(pie_data, names=names_col, values=aggregate_column((names_col,), values_col, agg), title=f"{agg.title()} of {values_col} by {names_col}")
             
             fig.update_layout(margin=dict(t=40, l=0, r=0, b=0))
             st.plotly_chart(fig, use_container_width=True)
@@ -136,26 +317,58 @@ if st.session_state.df is not None:
     
     elif chart_type == "Heatmap":
         if len(numeric_cols) >= 2:
-            # Correlation heatmap
-            corr_matrix = df[numeric_cols].corr()
-            
-            fig = go.Figure(data=go.Heatmap(
-                z=corr_matrix.values,
-                x=corr_matrix.columns,
-                y=corr_matrix.columns,
-                colorscale='RdBu',
-                zmid=0,
-                text=corr_matrix.values.round(2),
-                texttemplate='%{text}',
-                textfont={"size": 10},
-            ))
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                method = st.radio("Method", ["Pearson", "Spearman"], horizontal=True, key="corr_method")
+            with col2:
+                view = st.radio("View", ["Matrix", "Strongest pairs"], horizontal=True, key="corr_view")
+            with col3:
+                sample = st.checkbox(
+                    f"Sample {CORR_SAMPLE_ROWS:,} rows",
+                    value=len(df) > CORR_SAMPLE_ROWS,
+                    disabled=len(df) <= CORR_SAMPLE_ROWS,
+                    key="corr_sample"
+                )
             
-            fig.update_layout(
-                title="Correlation Heatmap",
-                margin=dict(t=40, l=0, r=0, b=0),
-                height=500
+            # Correlation heatmap
+            corr_matrix, rows_used = correlation_matrix(
+                df, version, tuple(numeric_cols), method.lower(),
+                CORR_SAMPLE_ROWS if sample else None
             )
-            st.plotly_chart(fig, use_container_width=True)
+            
+            if view == "Matrix":
+                heatmap_kwargs = {}
+                if len(numeric_cols) <= CORR_ANNOTATION_MAX:
+                    heatmap_kwargs = dict(
+                        text=corr_matrix.values.round(2),
+                        texttemplate='%{text}',
+                        textfont={"size": 10},
+                    )
+                fig = go.Figure(data=go.Heatmap(
+                    z=corr_matrix.values,
+                    x=corr_matrix.columns,
+                    y=corr_matrix.columns,
+                    colorscale='RdBu',
+                    zmid=0,
+                    zmin=-1,
+                    zmax=1,
+                    **heatmap_kwargs
+                ))
+                
+                fig.update_layout(
+                    title=f"{method} Correlation Heatmap",
+                    margin=dict(t=40, l=0, r=0, b=0),
+                    height=max(500, min(1200, 18 * len(numeric_cols)))
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                top_k = st.slider("Pairs to show", 5, 100, 20, key="corr_top_k")
+                st.dataframe(
+                    strongest_pairs(corr_matrix, top_k).round(4),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            st.caption(f"{len(numeric_cols)} numeric columns, {rows_used:,} rows")
         else:
             st.warning("Need at least 2 numeric columns for heatmap")
     
@@ -166,12 +379,13 @@ if st.session_state.df is not None:
     cols = st.columns(4)
     
     if numeric_cols:
+        quick_stats = column_profile(numeric_cols[:4])
         for i, col in enumerate(numeric_cols[:4]):
             with cols[i % 4]:
                 st.metric(
                     label=col,
-                    value=f"{df[col].mean():.2f}",
-                    delta=f"σ={df[col].std():.2f}"
+                    value=f"{quick_stats.at[col, 'mean']:.2f}",
+                    delta=f"σ={quick_stats.at[col, 'std']:.2f}"
                 )
 
 else:
@@ -1,44 +1,118 @@
 import streamlit as st
 import pandas as pd
-import json
 from datetime import datetime
+from functools import partial
+
+from utils.dataset import dataset_nbytes, dataset_version, set_dataset
+from utils.dtypes import optimize_dtypes
+from utils.export import EXPORT_FORMATS, build_export, export_available
+from utils.ingest import (
+    COLUMNAR_FORMATS,
+    CSV_CHUNK_MB,
+    CSV_SAMPLE_ROWS,
+    UPLOAD_FORMATS,
+    columnar_schema,
+    load_upload,
+    options_key,
+    upload_format,
+)
+from utils.filters import filter_kind, filter_positions, unique_values, value_range
+from utils.grid import paged_dataframe
+from utils.preferences import get_preference
+from utils.profile import column_profile, describe_numeric, top_values
 
 st.title(":material/table_chart: Data Analysis")
 
-st.markdown("Upload CSV or JSON files for instant analysis and insights.")
+st.markdown("Upload CSV, JSON, Parquet, Feather or Arrow files for instant analysis and insights.")
 
 # File uploader
 uploaded_file = st.file_uploader(
     "Upload your data file",
-    type=["csv", "json"],
-    help="Supported formats: CSV, JSON"
+    type=list(UPLOAD_FORMATS),
+    help="Supported formats: CSV, JSON, NDJSON/JSON Lines, Parquet, Feather, Arrow IPC"
 )
 
+with st.expander("Parse options", expanded=False):
+    optimize = st.checkbox(
+        "Optimize dtypes after load",
+        value=get_preference("optimize_dtypes", True),
+        help="Downcast numbers, categorize repeated strings and parse dates once after loading"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        chunk_mb = st.number_input("Chunk size (MB)", min_value=1, max_value=512, value=CSV_CHUNK_MB,
+                                   help="Bytes parsed per step; smaller chunks lower peak memory")
+    with col2:
+        sample_rows = st.number_input("Dtype sample rows", min_value=100, max_value=1_000_000,
+                                      value=CSV_SAMPLE_ROWS, step=1000,
+                                      help="Leading rows used to pick compact column types")
+
 if uploaded_file is not None:
-    # Store filename
-    st.session_state.uploaded_filename = uploaded_file.name
+    file_format = upload_format(uploaded_file.name)
+    if file_format == "csv":
+        parse_options = {"format": "csv", "chunk_mb": chunk_mb, "sample_rows": sample_rows}
+    elif file_format in COLUMNAR_FORMATS:
+        # Columnar files carry their schema, so only the chosen columns are read
+        try:
+            available_cols = columnar_schema(uploaded_file, file_format)
+        except ImportError:
+            st.error("Install pyarrow to load Parquet and Arrow files: `pip install pyarrow`", icon=":material/error:")
+            st.stop()
+        except Exception as e:
+            st.error(f"Error loading file: {str(e)}", icon=":material/error:")
+            st.stop()
+        load_cols = st.multiselect("Columns to load", available_cols, default=available_cols)
+        if not load_cols:
+            st.warning("Select at least one column to load", icon=":material/warning:")
+            st.stop()
+        parse_options = {
+            "format": file_format,
+            "columns": None if len(load_cols) == len(available_cols) else load_cols,
+        }
+    else:
+        parse_options = {"format": "json"}
+    parse_options["optimize"] = optimize
+    upload_key = (uploaded_file.file_id, options_key(parse_options))
     
-    # Load data based on file type
-    try:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith('.json'):
-            json_data = json.load(uploaded_file)
-            # Try to convert to DataFrame
-            if isinstance(json_data, list):
-                df = pd.DataFrame(json_data)
-            elif isinstance(json_data, dict):
-                df = pd.DataFrame([json_data])
-            else:
-                st.error("JSON format not supported. Please use list of objects or single object.")
-                st.stop()
+    # Reruns keep returning the same upload; only parse when the file or options change
+    loaded = st.session_state.get("loaded_upload")
+    if loaded and loaded["key"] == upload_key and loaded["version"] == dataset_version():
+        st.success(f"✓ Loaded {len(st.session_state.df)} rows from {uploaded_file.name}", icon=":material/check_circle:")
+    else:
+        progress_bar = st.progress(0.0, text="Reading file...")
         
-        st.session_state.df = df
-        st.success(f"✓ Loaded {len(df)} rows from {uploaded_file.name}", icon=":material/check_circle:")
+        def show_progress(rows, bytes_read, total_bytes):
+            total = total_bytes or bytes_read or 1
+            progress_bar.progress(
+                min(bytes_read / total, 1.0),
+                text=f"Read {rows:,} rows ({bytes_read / 1024**2:.1f} of {total / 1024**2:.1f} MB)"
+            )
         
-    except Exception as e:
-        st.error(f"Error loading file: {str(e)}", icon=":material/error:")
-        st.stop()
+        try:
+            df, version, cache_hit, meta = load_upload(uploaded_file, parse_options, show_progress)
+        except Exception as e:
+            progress_bar.empty()
+            st.error(f"Error loading file: {str(e)}", icon=":material/error:")
+            st.stop()
+        progress_bar.empty()
+        
+        set_dataset(df, uploaded_file.name, version)
+        st.session_state.loaded_upload = {"key": upload_key, "version": version, **meta}
+        st.session_state.optimize_report = {"version": version, "report": meta["optimize_report"]}
+        source = " (cached)" if cache_hit else ""
+        st.success(f"✓ Loaded {len(df)} rows from {uploaded_file.name}{source}", icon=":material/check_circle:")
+        loaded = st.session_state.loaded_upload
+    
+    if loaded["errors"]:
+        lost = sum(err.skipped is None for err in loaded["errors"])
+        skipped = sum(err.skipped or 0 for err in loaded["errors"])
+        problems = [f"{lost} chunk(s) could not be parsed and were skipped"] if lost else []
+        problems += [f"{skipped:,} malformed row(s) were skipped"] if skipped else []
+        st.warning("; ".join(problems), icon=":material/warning:")
+        for err in loaded["errors"]:
+            with st.expander(f"Chunk {err.index} (after row {err.first_row:,})"):
+                st.caption(err.message)
+                st.code(err.preview)
 
 # Display data if available
 if st.session_state.df is not None:
@@ -54,17 +128,35 @@ if st.session_state.df is not None:
     
     with tab1:
         st.subheader("Data Preview")
-        st.dataframe(
-            df.head(100),
-            use_container_width=True,
-            height=400
-        )
+        paged_dataframe(df, key="preview")
         
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Rows", len(df))
         col2.metric("Columns", len(df.columns))
-        col3.metric("Memory", f"{df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
-        col4.metric("Null Values", df.isnull().sum().sum())
+        col3.metric("Memory", f"{dataset_nbytes() / 1024**2:.2f} MB")
+        col4.metric("Null Values", int(column_profile()["nulls"].sum()))
+        
+        # Dtype optimization runs once per dataset; its result replaces the session frame
+        optimized_state = st.session_state.get("optimize_report")
+        if optimized_state and optimized_state["version"] == dataset_version() and optimized_state["report"] is not None:
+            report = optimized_state["report"]
+            before_mb = report["Before MB"].sum()
+            after_mb = report["After MB"].sum()
+            with st.expander(f"Memory optimization: {before_mb:.2f} MB → {after_mb:.2f} MB"):
+                st.dataframe(report.round(3), use_container_width=True, hide_index=True)
+        elif st.button(":material/compress: Optimize memory", help="Downcast numbers, categorize repeated strings and parse dates"):
+            with st.spinner("Optimizing dtypes..."):
+                optimized, report = optimize_dtypes(df)
+            previous_version = dataset_version()
+            changed = report.loc[report["Before"] != report["After"], "Column"].tolist()
+            set_dataset(optimized, st.session_state.uploaded_filename, f"{previous_version}-opt",
+                        parent=previous_version, changed_columns=changed)
+            # Keep the uploader from reloading the unoptimized frame on the next rerun
+            loaded = st.session_state.get("loaded_upload")
+            if loaded and loaded["version"] == previous_version:
+                loaded["version"] = dataset_version()
+            st.session_state.optimize_report = {"version": dataset_version(), "report": report}
+            st.rerun()
     
     with tab2:
         st.subheader("Statistical Summary")
@@ -74,23 +166,23 @@ if st.session_state.df is not None:
         if len(numeric_cols) > 0:
             st.markdown("**Numeric Columns**")
             st.dataframe(
-                df[numeric_cols].describe(),
+                describe_numeric(numeric_cols),
                 use_container_width=True
             )
         
         # Categorical columns
-        categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'string', 'category']).columns
         if len(categorical_cols) > 0:
             st.markdown("**Categorical Columns**")
             for col in categorical_cols[:5]:  # Show first 5
                 with st.expander(f"Column: {col}"):
-                    value_counts = df[col].value_counts().head(10)
+                    value_counts = top_values(col, 10)
                     st.bar_chart(value_counts)
-                    st.caption(f"Top 10 values out of {df[col].nunique()} unique values")
+                    st.caption(f"Top 10 values out of {column_profile([col]).at[col, 'unique']} unique values")
         
         # Missing data analysis
         st.markdown("**Missing Data Analysis**")
-        missing_data = df.isnull().sum()
+        missing_data = column_profile()["nulls"]
         missing_data = missing_data[missing_data > 0].sort_values(ascending=False)
         
         if len(missing_data) > 0:
@@ -115,96 +207,77 @@ if st.session_state.df is not None:
         
         if selected_cols:
             # Filter options
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                filter_col = st.selectbox(
-                    "Filter by column",
-                    ["None"] + df.columns.tolist()
-                )
-            
-            filtered_df = df[selected_cols].copy()
+            filter_cols = st.multiselect(
+                "Filter by columns",
+                df.columns.tolist(),
+                help="All filters must match (AND)"
+            )
             
-            if filter_col != "None":
-                with col2:
-                    if df[filter_col].dtype in ['object', 'category']:
-                        unique_vals = df[filter_col].unique()
-                        filter_val = st.multiselect(
-                            f"Select {filter_col} values",
-                            unique_vals
-                        )
-                        if filter_val:
-                            filtered_df = df[df[filter_col].isin(filter_val)][selected_cols]
-                    else:
-                        min_val = float(df[filter_col].min())
-                        max_val = float(df[filter_col].max())
+            predicates = []
+            filter_widgets = st.columns(min(len(filter_cols), 3)) if filter_cols else []
+            for i, filter_col in enumerate(filter_cols):
+                with filter_widgets[i % len(filter_widgets)]:
+                    if filter_kind(df[filter_col]) == "range":
+                        bounds = value_range(df, filter_col)
+                        if bounds is None or bounds[0] == bounds[1]:
+                            st.caption(f"{filter_col}: nothing to filter")
+                            continue
+                        if pd.api.types.is_datetime64_any_dtype(df[filter_col]):
+                            min_val, max_val = (pd.Timestamp(b).to_pydatetime() for b in bounds)
+                        else:
+                            min_val, max_val = (float(b) for b in bounds)
                         filter_range = st.slider(
                             f"Filter {filter_col} range",
                             min_val, max_val,
-                            (min_val, max_val)
+                            (min_val, max_val),
+                            key=f"explore_range_{filter_col}"
                         )
-                        filtered_df = df[
-                            (df[filter_col] >= filter_range[0]) &
-                            (df[filter_col] <= filter_range[1])
-                        ][selected_cols]
+                        if filter_range != (min_val, max_val):
+                            predicates.append((filter_col, "range", filter_range))
+                    else:
+                        filter_val = st.multiselect(
+                            f"Select {filter_col} values",
+                            unique_values(df, filter_col),
+                            key=f"explore_in_{filter_col}"
+                        )
+                        if filter_val:
+                            predicates.append((filter_col, "in", tuple(filter_val)))
             
-            st.dataframe(filtered_df, use_container_width=True, height=400)
-            st.caption(f"Showing {len(filtered_df)} of {len(df)} rows")
+            # Filters produce row positions; only the visible page is ever materialized
+            positions = filter_positions(df, predicates)
+            paged_dataframe(df, key="explore", positions=positions, columns=selected_cols)
+            st.caption(f"Showing {len(df) if positions is None else len(positions)} of {len(df)} rows")
     
     with tab4:
         st.subheader("Export Data")
+        st.caption("Files are generated when you click a download button and reused until the data changes.")
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # CSV export
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            csv = df.to_csv(index=False)
-            
-            st.download_button(
-                label=":material/download: Download as CSV",
-                data=csv,
-                file_name=f"export_{timestamp}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-        
-        with col2:
-            # JSON export
-            json_str = df.to_json(orient='records', indent=2)
-            
-            st.download_button(
-                label=":material/download: Download as JSON",
-                data=json_str,
-                file_name=f"export_{timestamp}.json",
-                mime="application/json",
-                use_container_width=True
-            )
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        export_cols = st.columns(len(EXPORT_FORMATS))
         
-        # Excel export (if openpyxl available)
-        try:
-            import io
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Data', index=False)
+        for export_col, (fmt, spec) in zip(export_cols, EXPORT_FORMATS.items()):
+            with export_col:
+                if not export_available(fmt):
+                    package = spec["requires"]
+                    st.info(f"Install {package} to enable {fmt} export: `pip install {package}`")
+                    continue
                 
-                # Add statistics sheet
-                if len(numeric_cols) > 0:
-                    df[numeric_cols].describe().to_excel(writer, sheet_name='Statistics')
-            
-            st.download_button(
-                label=":material/download: Download as Excel",
-                data=output.getvalue(),
-                file_name=f"export_{timestamp}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        except ImportError:
-            st.info("Install openpyxl to enable Excel export: `pip install openpyxl`")
+                stats = None
+                if fmt == "Excel":
+                    # Add statistics sheet
+                    stats = describe_numeric(numeric_cols) if len(numeric_cols) > 0 else None
+                
+                st.download_button(
+                    label=f":material/download: {fmt}",
+                    data=partial(build_export, df, dataset_version(), fmt, stats),
+                    file_name=f"export_{timestamp}.{spec['ext']}",
+                    mime=spec["mime"],
+                    use_container_width=True
+                )
 
 else:
     # Show placeholder when no data
-    st.info("Upload a CSV or JSON file to get started!", icon=":material/upload:")
+    st.info("Upload a CSV, JSON, Parquet, Feather or Arrow file to get started!", icon=":material/upload:")
     
     with st.expander("Example Data Format"):
         st.markdown("**CSV Example:**")
@@ -223,3 +296,9 @@ Charlie,23,Boston,92
   {"name": "Charlie", "age": 23, "city": "Boston", "score": 92}
 ]
         """)
+        
+        st.markdown("**NDJSON Example** (one record per line, nested objects become `parent.child` columns):")
+        st.code("""
+{"name": "Alice", "address": {"city": "New York"}, "score": 95}
+{"name": "Bob", "address": {"city": "San Francisco"}, "score": 87}
+        """)
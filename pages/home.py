@@ -17,7 +17,7 @@ with col1:
 with col2:
     with st.container(border=True):
         st.subheader(":material/table_chart: Data Analysis")
-        st.write("Upload CSV or JSON files for instant analysis and insights.")
+        st.write("Upload CSV, JSON, Parquet or Arrow files for instant analysis and insights.")
         st.page_link("pages/data_analysis.py", label="Analyze Data", icon=":material/arrow_forward:")
 
 with col3:
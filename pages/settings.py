@@ -2,6 +2,9 @@ import streamlit as st
 import os
 from pathlib import Path
 
+from utils.llm import DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT, pool_stats
+from utils.response_cache import DEFAULT_MAX_MB, DEFAULT_TTL_HOURS, RESPONSE_CACHE_MODES
+
 st.title(":material/settings: Settings")
 
 st.markdown("Configure your API keys and application preferences.")
@@ -116,6 +119,12 @@ with st.form("preferences_form"):
         help="Automatically generate statistics when data is uploaded"
     )
     
+    optimize_dtypes = st.checkbox(
+        "Optimize dtypes after load",
+        value=True,
+        help="Downcast numbers, categorize repeated strings and parse dates to save memory"
+    )
+    
     st.markdown("**AI Settings**")
     
     default_provider = st.selectbox(
@@ -123,6 +132,66 @@ with st.form("preferences_form"):
         ["OpenAI", "Anthropic"]
     )
     
+    context_tokens = st.number_input(
+        "Data context token budget",
+        min_value=200,
+        max_value=50000,
+        value=2000,
+        step=100,
+        help="Upper bound on the dataset summary sent to the chatbot; wide tables are truncated and summarized"
+    )
+    
+    history_tokens = st.number_input(
+        "Chat history token budget",
+        min_value=500,
+        max_value=100000,
+        value=4000,
+        step=500,
+        help="Recent messages are sent verbatim up to this size; older ones are replaced by a summary"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        llm_timeout = st.number_input(
+            "Request timeout (s)",
+            min_value=5.0,
+            max_value=600.0,
+            value=DEFAULT_TIMEOUT,
+            step=5.0,
+            help="How long to wait for an LLM provider before giving up"
+        )
+    with col2:
+        llm_max_retries = st.number_input(
+            "Max retries",
+            min_value=0,
+            max_value=10,
+            value=DEFAULT_MAX_RETRIES,
+            help="Retries with exponential backoff on rate limits, timeouts and server errors"
+        )
+    
+    response_cache = st.selectbox(
+        "Response cache",
+        RESPONSE_CACHE_MODES,
+        index=1,
+        help="Replay saved answers for repeated questions about the same data; similar matching also catches rephrasings"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        response_cache_ttl_hours = st.number_input(
+            "Cache lifetime (hours)",
+            min_value=1,
+            max_value=24 * 30,
+            value=DEFAULT_TTL_HOURS
+        )
+    with col2:
+        response_cache_mb = st.number_input(
+            "Cache size limit (MB)",
+            min_value=1,
+            max_value=1024,
+            value=DEFAULT_MAX_MB
+        )
+    
     streaming = st.checkbox(
         "Enable streaming responses",
         value=True,
@@ -140,8 +209,16 @@ with st.form("preferences_form"):
             "default_chart": default_chart,
             "max_rows": max_rows,
             "auto_analyze": auto_analyze,
+            "optimize_dtypes": optimize_dtypes,
             "default_provider": default_provider,
-            "streaming": streaming
+            "streaming": streaming,
+            "context_tokens": context_tokens,
+            "history_tokens": history_tokens,
+            "llm_timeout": llm_timeout,
+            "llm_max_retries": llm_max_retries,
+            "response_cache": response_cache,
+            "response_cache_ttl_hours": response_cache_ttl_hours,
+            "response_cache_mb": response_cache_mb
         }
 
 st.divider()
@@ -164,6 +241,14 @@ with col3:
     else:
         st.metric("Loaded Dataset", "None")
 
+with st.expander(":material/lan: LLM Connection Pool", expanded=False):
+    st.caption("Clients are shared across reruns and sessions so HTTP connections are reused.")
+    clients = pool_stats()
+    if clients.empty:
+        st.info("No LLM clients created yet", icon=":material/info:")
+    else:
+        st.dataframe(clients, use_container_width=True, hide_index=True)
+
 # Session State Debug (optional)
 with st.expander(":material/bug_report: Debug: Session State", expanded=False):
     st.json({
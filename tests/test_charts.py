@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.charts import aggregate, aggregate_column, box_stats, downsample_line, sample_scatter
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(1)
+    n = 20_000
+    return pd.DataFrame({
+        "x": rng.normal(size=n),
+        "y": rng.normal(size=n),
+        "few": rng.choice(list("abc"), size=n),
+        "many": rng.integers(0, 5000, size=n).astype(str),
+    })
+
+
+@pytest.mark.parametrize("color", [None, "few", "many"])
+def test_sample_scatter_respects_budget(points, color):
+    sample, total = sample_scatter(points, f"budget-{color}", "x", "y", color, None, 1000)
+    assert total == len(points)
+    assert 0 < len(sample) <= 1000
+
+
+def test_sample_scatter_keeps_every_small_stratum(points):
+    sample, _ = sample_scatter(points, "strata", "x", "y", "few", None, 300)
+    assert set(sample["few"]) == {"a", "b", "c"}
+
+
+def test_aggregate_column_by_itself():
+    df = pd.DataFrame({"s": ["a", "b", "a"], "v": [1, 2, 3]})
+    counted = aggregate(df, "self-group", ("s",), "s", "count")
+    assert counted.set_index("s")[aggregate_column(("s",), "s", "count")].to_dict() == {"a": 2, "b": 1}
+    summed = aggregate(df, "self-group", ("s",), "v", "sum")
+    assert list(summed.columns) == ["s", "v"]
+
+
+def test_count_of_a_column_named_count():
+    df = pd.DataFrame({"count": [1, 1, 2]})
+    result = aggregate(df, "count-col", ("count",), None, "count")
+    assert result[aggregate_column(("count",), None, "count")].tolist() == [2, 1]
+
+
+def test_box_stats_reads_numeric_text_and_rejects_text():
+    df = pd.DataFrame({"n": ["1", "2", "3", "4"], "t": ["a", "b", "c", "d"]})
+    assert box_stats(df, "box", "n", ()).loc[0, "median"] == 2.5
+    with pytest.raises(ValueError):
+        box_stats(df, "box", "t", ())
+
+
+@pytest.mark.parametrize("method", ["LTTB", "Min/Max per bucket"])
+def test_downsample_line_budget_counts_every_series(method):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"t": np.arange(50_000), "a": rng.normal(size=50_000), "b": rng.normal(size=50_000)})
+    line, total = downsample_line(df, f"multi-{method}", "t", ("a", "b"), None, 1000, method)
+    assert total == 100_000
+    assert int(line[["a", "b"]].notna().sum().sum()) <= 1000
+    assert line["t"].is_monotonic_increasing
+
+
+def test_downsample_line_floor_does_not_exceed_budget():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"t": np.arange(20_000), "y": rng.normal(size=20_000),
+                       "g": rng.integers(0, 500, size=20_000)})
+    line, _ = downsample_line(df, "many-groups", "t", ("y",), "g", 600, "LTTB")
+    assert len(line) <= 600
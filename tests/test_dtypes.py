@@ -0,0 +1,54 @@
+import pandas as pd
+
+from utils.dtypes import date_format, infer_column_plan, optimize_dtypes
+
+
+def test_non_string_objects_are_left_untouched():
+    df = pd.DataFrame({
+        "lists": [[1], [2], [1], [2]],
+        "dicts": [{"a": 1}, {"a": 1}, {"a": 2}, {"a": 1}],
+        "mixed": [1, "a", 1, "a"],
+    })
+    optimized, _ = optimize_dtypes(df)
+    assert (optimized.dtypes == object).all()
+    assert optimized["mixed"].tolist() == [1, "a", 1, "a"]
+    assert infer_column_plan(df) == {}
+
+
+def test_plain_strings_are_still_compacted():
+    optimized, _ = optimize_dtypes(pd.DataFrame({"s": ["a", "b", "a", "a"]}))
+    assert isinstance(optimized["s"].dtype, pd.CategoricalDtype)
+
+
+def test_year_only_text_is_not_a_date():
+    series = pd.Series(["2000", "2001", "2002"])
+    assert date_format(series) is None
+    optimized, _ = optimize_dtypes(pd.DataFrame({"year": series}))
+    assert not pd.api.types.is_datetime64_any_dtype(optimized["year"])
+
+
+def test_year_month_text_is_a_date():
+    assert date_format(pd.Series(["2024-01-05", "2024-02-06"])) == "%Y-%m-%d"
+    assert date_format(pd.Series(["2024-01", "2024-02"])) is not None
+
+
+def test_partly_parsing_dates_are_left_as_text():
+    values = ["2024-01-05"] * 1000 + ["01/15/2024"] * 500 + ["unknown"] * 3
+    optimized, _ = optimize_dtypes(pd.DataFrame({"d": values}))
+    assert not pd.api.types.is_datetime64_any_dtype(optimized["d"])
+    assert optimized["d"].astype(str).tolist() == values
+
+
+def test_dates_with_missing_values_are_converted():
+    optimized, _ = optimize_dtypes(pd.DataFrame({"d": ["2024-01-05", None, "2024-02-06"]}))
+    assert pd.api.types.is_datetime64_any_dtype(optimized["d"])
+    assert optimized["d"].isna().tolist() == [False, True, False]
+
+
+def test_categorized_dates_are_converted():
+    series = pd.Series(["2024-01-05", "2024-01-06", None, "2024-01-05"], dtype="category")
+    optimized, report = optimize_dtypes(pd.DataFrame({"d": series}))
+    assert pd.api.types.is_datetime64_any_dtype(optimized["d"])
+    assert optimized["d"].dt.day.tolist()[:2] == [5, 6]
+    assert optimized["d"].isna().tolist() == [False, False, True, False]
+    assert report.loc[0, "Before"] == "category"
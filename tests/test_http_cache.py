@@ -0,0 +1,99 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import utils.http_cache as http_cache
+from utils.http_cache import HTTPCache, cached_request, freshness_lifetime
+from utils.http_client import get_session
+
+
+class Handler(BaseHTTPRequestHandler):
+    hits = Counter()
+    on_revalidate = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            if self.on_revalidate:
+                self.on_revalidate()
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/etag":
+            self.send_header("ETag", '"v1"')
+        elif self.path == "/fresh":
+            self.send_header("Cache-Control", "max-age=3600")
+        elif self.path == "/private":
+            self.send_header("Cache-Control", "private, max-age=3600")
+            self.send_header("ETag", '"p1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    cache = HTTPCache(tmp_path / "http")
+    monkeypatch.setattr(http_cache, "get_http_cache", lambda: cache)
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    Handler.hits.clear()
+    Handler.on_revalidate = None
+    yield f"http://127.0.0.1:{srv.server_port}", cache
+    srv.shutdown()
+
+
+def fetch(url, headers=None):
+    return cached_request(get_session(), "GET", url, headers=headers)[2]
+
+
+def test_plain_response_is_fetched_every_time(server):
+    base, _ = server
+    assert [fetch(f"{base}/plain") for _ in range(2)] == ["MISS", "MISS"]
+    assert Handler.hits["/plain"] == 2
+
+
+def test_validated_response_is_revalidated(server):
+    base, _ = server
+    assert [fetch(f"{base}/etag") for _ in range(2)] == ["MISS", "REVALIDATED"]
+
+
+def test_entry_evicted_before_304_is_fetched_again(server):
+    base, cache = server
+    fetch(f"{base}/etag")
+    Handler.on_revalidate = cache.clear
+    assert fetch(f"{base}/etag") == "MISS"
+    assert Handler.hits["/etag"] == 3
+
+
+def test_private_response_is_not_stored(server):
+    base, cache = server
+    assert [fetch(f"{base}/private") for _ in range(2)] == ["MISS", "MISS"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_request_max_age_is_honoured(server):
+    base, _ = server
+    assert fetch(f"{base}/fresh") == "MISS"
+    assert fetch(f"{base}/fresh", {"Cache-Control": "max-age=600"}) == "HIT"
+    assert fetch(f"{base}/fresh", {"Cache-Control": "max-age=0"}) == "MISS"
+    assert fetch(f"{base}/fresh", {"Cache-Control": "no-cache"}) == "MISS"
+    assert Handler.hits["/fresh"] == 3
+
+
+def test_last_modified_heuristic():
+    headers = {"Date": "Wed, 11 Oct 2023 00:00:00 GMT", "Last-Modified": "Wed, 01 Oct 2023 00:00:00 GMT"}
+    assert freshness_lifetime(headers, 0) == pytest.approx(86_400)
+    headers["Last-Modified"] = "Tue, 10 Oct 2023 14:00:00 GMT"
+    assert freshness_lifetime(headers, 0) == pytest.approx(3_600)
+    assert freshness_lifetime({}, 0) == 0
@@ -0,0 +1,65 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.http_client import batch_frame, get_session, run_batch
+
+
+class Handler(BaseHTTPRequestHandler):
+    hits = Counter()
+    cookies = []
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        self.cookies.append(self.headers.get("Cookie"))
+        self.reply(200, {"Set-Cookie": "sid=SECRET; Path=/"} if self.path == "/login" else None)
+
+    def do_POST(self):
+        self.hits[self.path] += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.reply(503)
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    Handler.hits.clear()
+    Handler.cookies.clear()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+
+def test_cookies_are_not_kept_between_requests(server):
+    session = get_session()
+    session.get(f"{server}/login")
+    session.get(f"{server}/other")
+    get_session().get(f"{server}/other")
+    assert Handler.cookies == [None, None, None]
+
+
+def test_failed_post_is_not_retried(server):
+    response = get_session(retries=3, backoff=0).post(f"{server}/submit", json={"a": 1})
+    assert response.status_code == 503
+    assert Handler.hits["/submit"] == 1
+
+
+def test_batch_frame_has_per_request_timing(server):
+    results = run_batch([(f"{server}/a", {"id": 1}), (f"{server}/b", {"id": 2})], retries=0)
+    results[0].payload, results[1].payload = {"x": 1}, [{"x": 2}, {"x": 3}]
+    frame = batch_frame(results)
+    assert list(frame.columns[:2]) == ["request.id", "elapsed_ms"]
+    assert frame["elapsed_ms"].tolist()[1:] == [results[1].latency * 1000] * 2
+    assert (frame["elapsed_ms"] > 0).all()
@@ -0,0 +1,84 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from utils.dtypes import concat_chunks
+from utils.ingest import load_upload, read_csv_chunked, read_json_streaming
+
+
+def test_header_only_csv_keeps_columns():
+    df, errors = read_csv_chunked(io.BytesIO(b"a,b,c\n"))
+    assert df.empty
+    assert list(df.columns) == ["a", "b", "c"]
+    assert errors == []
+
+
+def test_header_only_csv_without_newline():
+    df, _ = read_csv_chunked(io.BytesIO(b"a,b"))
+    assert df.empty
+    assert list(df.columns) == ["a", "b"]
+
+
+def test_load_upload_header_only_csv():
+    df, _, _, _ = load_upload(io.BytesIO(b"x,y\n"), {"format": "csv", "optimize": True})
+    assert df.empty and list(df.columns) == ["x", "y"]
+
+
+def test_empty_json_array_loads_empty_frame():
+    assert read_json_streaming(io.BytesIO(b"[]")).empty
+
+
+def test_load_upload_empty_json_array():
+    df, _, _, _ = load_upload(io.BytesIO(b" [ ] "), {"format": "json", "optimize": True})
+    assert df.empty
+
+
+def test_empty_json_file_is_an_error():
+    with pytest.raises(ValueError):
+        read_json_streaming(io.BytesIO(b""))
+
+
+def test_json_key_missing_from_a_later_batch():
+    lines = [{"kind": "a" if i % 2 else "b", "n": i} for i in range(4)]
+    lines += [{"n": i} for i in range(4, 8)]
+    lines += [{"kind": "c", "n": 8}]
+    data = "\n".join(json.dumps(line) for line in lines).encode()
+    df = read_json_streaming(io.BytesIO(data), batch_rows=4)
+    assert len(df) == 9
+    assert isinstance(df["kind"].dtype, pd.CategoricalDtype)
+    assert df["kind"].isna().sum() == 4
+    assert df["kind"].iloc[-1] == "c"
+
+
+def test_categorical_column_first_seen_in_a_later_chunk():
+    first = pd.DataFrame({"n": [1, 2]})
+    second = pd.DataFrame({"n": [3], "kind": pd.Categorical(["x"])})
+    third = pd.DataFrame({"n": [4], "kind": pd.Categorical(["y"])})
+    df = concat_chunks([first, second, third])
+    assert isinstance(df["kind"].dtype, pd.CategoricalDtype)
+    assert df["kind"].tolist()[2:] == ["x", "y"]
+
+
+def test_csv_column_turning_to_text_is_text_throughout():
+    data = b"code,name\n" + b"12345,abcdef\n" * 100_000 + b"A-17,ghijkl\n"
+    df, errors = read_csv_chunked(io.BytesIO(data), chunk_mb=1)
+    assert errors == []
+    assert len(df) == 100_001
+    assert {type(v) for v in df["code"]} == {str}
+    assert df["code"].iloc[0] == "12345" and df["code"].iloc[-1] == "A-17"
+
+
+def test_csv_integers_with_later_blanks_become_floats():
+    data = b"n,name\n" + b"7,abcdefghij\n" * 100_000 + b",klmnopqrst\n"
+    df, _ = read_csv_chunked(io.BytesIO(data), chunk_mb=1)
+    assert pd.api.types.is_float_dtype(df["n"].dtype)
+    assert df["n"].isna().sum() == 1 and df["n"].iloc[0] == 7
+
+
+def test_csv_malformed_rows_are_skipped_not_the_chunk():
+    df, errors = read_csv_chunked(io.BytesIO(b"a,b\n1,x\n2,y,extra\n3,z\n"))
+    assert df["a"].tolist() == [1, 3]
+    assert len(errors) == 1 and errors[0].skipped == 1
+    assert "2,y,extra" in errors[0].preview
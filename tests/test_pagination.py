@@ -0,0 +1,94 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+from utils.pagination import paginate
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        if url.path == "/list":
+            # A bare list on every page, linked by Link headers
+            headers = {"Link": f'<http://{self.headers["Host"]}/list?page={page + 1}>; rel="next"'} if page < 3 else None
+            self.reply([{"id": page * 10 + i} for i in range(2)], headers)
+        elif url.path == "/broken":
+            # The second page changes shape
+            body = {"data": [{"id": 1}]} if page == 1 else ["unexpected"]
+            self.reply(body, {"Link": f'<http://{self.headers["Host"]}/broken?page=2>; rel="next"'} if page == 1 else None)
+
+        elif url.path == "/flaky":
+            # The second page is a server error
+            if page == 2:
+                self.send_error(500)
+                return
+            self.reply([{"id": 1}], {"Link": f'<http://{self.headers["Host"]}/flaky?page=2>; rel="next"'})
+        elif url.path == "/down":
+            self.send_error(404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.reply({"/graphql-list": [1, 2], "/graphql-null": {"data": {"users": None}}}[self.path])
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+
+def test_link_pagination_over_list_root(server):
+    frame, info = paginate({"method": "GET", "url": f"{server}/list"}, "Link header", {"records_path": ""})
+    assert frame["id"].tolist() == [10, 11, 20, 21, 30, 31]
+    assert info["pages"] == 3 and not info["error"]
+
+
+def test_records_path_into_list_root_is_reported(server):
+    with pytest.raises(ValueError, match="Pagination stopped on page 1: no records at 'data'"):
+        paginate({"method": "GET", "url": f"{server}/list"}, "Link header", {"records_path": "data"})
+
+
+@pytest.mark.parametrize("path", ["/graphql-list", "/graphql-null"])
+def test_graphql_cursor_on_unexpected_shape_is_reported(server, path):
+    request = {"method": "POST", "url": f"{server}{path}", "json": {"query": "{ users { nodes { id } } }"}}
+    options = {"connection_path": "data.users", "cursor_variable": "after"}
+    with pytest.raises(ValueError, match="Pagination stopped on page 1"):
+        paginate(request, "GraphQL cursor", options)
+
+
+def test_later_bad_page_keeps_earlier_rows(server):
+    frame, info = paginate({"method": "GET", "url": f"{server}/broken"}, "Link header", {"records_path": "data"})
+    assert frame["id"].tolist() == [1]
+    assert info["error"] and info["stopped"].startswith("page 2")
+
+
+def test_later_http_error_keeps_earlier_rows(server):
+    frame, info = paginate({"method": "GET", "url": f"{server}/flaky"}, "Link header", {"records_path": ""})
+    assert frame["id"].tolist() == [1]
+    assert info["pages"] == 1 and info["rows"] == 1
+    assert info["error"] and info["stopped"].startswith("page 2: 500")
+
+
+def test_first_page_http_error_raises(server):
+    with pytest.raises(requests.HTTPError):
+        paginate({"method": "GET", "url": f"{server}/down"}, "Link header", {"records_path": ""})
@@ -0,0 +1,42 @@
+import threading
+
+import pandas as pd
+
+from utils.polling import RingBuffer
+
+
+def test_ring_buffer_dedupes_and_wraps():
+    buffer = RingBuffer(4, key="id")
+    assert buffer.append(pd.DataFrame({"id": [1, 2, 3], "v": [1.0, 2.0, 3.0]})) == (3, 0)
+    assert buffer.append(pd.DataFrame({"id": [3, 4, 5], "v": [3.0, 4.0, 5.0]})) == (2, 1)
+    assert buffer.to_frame()["id"].tolist() == [2, 3, 4, 5]
+    # id 1 was overwritten, so it counts as new again
+    assert buffer.append(pd.DataFrame({"id": [1], "v": [9.0]})) == (1, 0)
+    with buffer.lock:
+        window = buffer.window(["v"], last=2)
+    assert window["v"].tolist() == [5.0, 9.0]
+
+
+def test_schema_reads_while_appending():
+    buffer = RingBuffer(100)
+    errors = []
+
+    def writer():
+        for i in range(300):
+            buffer.append(pd.DataFrame({f"c{i}": [float(i)], f"s{i % 7}": ["x"]}))
+
+    def reader():
+        try:
+            for _ in range(2000):
+                buffer.columns
+                buffer.numeric_columns()
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(buffer.numeric_columns()) == 300
@@ -0,0 +1,43 @@
+import pytest
+
+from utils.response_cache import SIMILARITY_THRESHOLD, ResponseCache, normalize, same_words, similarity
+
+
+@pytest.mark.parametrize("a, b", [
+    ("total revenue for 2023?", "total revenue for 2024?"),
+    ("mean of column_a", "mean of column_b"),
+    ("top 5 products by sales", "top 10 products by sales"),
+    ("average of `Sales`", "average of `Profit`"),
+    ("which region has the highest total sales", "which region has the lowest total sales"),
+    ("which product sold the most units", "which product sold the least units"),
+    ("average of the price column", "average of the cost column"),
+    ("plot revenue by month", "plot profit by month"),
+    ("customers with orders", "customers without orders"),
+])
+def test_near_miss_questions_are_not_similar(a, b):
+    assert similarity(normalize(a), normalize(b)) < SIMILARITY_THRESHOLD
+
+
+@pytest.mark.parametrize("a, b", [
+    ("what is the total revenue for 2023", "what is the total revenu for 2023"),
+    ("show the mean of column_a by region", "show the mean of column_a by regions"),
+    ("which region has the highest total sales", "which region has the higest total sales"),
+])
+def test_rephrased_questions_are_similar(a, b):
+    assert similarity(normalize(a), normalize(b)) >= SIMILARITY_THRESHOLD
+
+
+def test_similar_mode_does_not_replay_a_different_year(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3")
+    scope = cache.scope("model", "v1", [])
+    cache.put(scope, "Total revenue for 2023?", "2023 answer", max_bytes=1024**2)
+    assert cache.get(scope, "Total revenue for 2024?", ttl=3600, threshold=SIMILARITY_THRESHOLD) is None
+    response, score = cache.get(scope, "total revenue for 2023", ttl=3600, threshold=SIMILARITY_THRESHOLD)
+    assert response == "2023 answer" and score == 1.0
+
+
+def test_same_words_ignores_filler_and_single_typos():
+    assert same_words("show me the total sales by region", "total sales by region")
+    assert same_words("total slaes by region", "total sales by region")
+    assert not same_words("total sales by region", "total sales")
+    assert not same_words("max price", "min price")
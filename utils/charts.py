@@ -0,0 +1,382 @@
+"""Server-side data reduction for Dashboard charts.
+
+Cached functions take the frame as ``_df`` so Streamlit does not hash it and key
+the cache on the dataset ``version`` token instead.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.dtypes import date_format, is_text
+
+DEFAULT_POINT_BUDGET = 10_000
+SCATTER_STRATA_BINS = 32
+DENSITY_BINS = 100
+
+
+def _axis_values(series: pd.Series) -> np.ndarray:
+    """Numeric positions for an axis column (datetimes as int64, text by row order)."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.to_numpy().astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    return np.arange(len(series), dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` points that keep the line's shape."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    bounds = np.append(np.floor(np.arange(n_out - 1) * every).astype(np.int64) + 1, n)
+    bounds[n_out - 2] = n - 1
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = bounds[i], bounds[i + 1]
+        next_start, next_end = bounds[i + 1], bounds[i + 2]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the min and max point of each of ``n_out // 2`` equal-count buckets."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max(1, n_out // 2)
+    buckets = np.arange(n) * n_buckets // n
+    grouped = pd.Series(y).groupby(buckets)
+    picked = np.concatenate([grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy(), [0, n - 1]])
+    return np.unique(picked)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def downsample_line(_df, version, x_col, y_cols: tuple, color_col, budget: int, method: str):
+    """Reduce line-chart data to about ``budget`` points; returns ``(frame, total_points)``.
+
+    Each series (y column, per color group) is sorted by x and reduced independently
+    with LTTB or min/max-per-bucket, then the kept rows are combined. Every kept row
+    plots all of ``y_cols``, so at most ``budget // len(y_cols)`` rows are kept.
+    """
+    columns = list(dict.fromkeys([x_col, *y_cols] + ([color_col] if color_col else [])))
+    data = _df[columns].reset_index(drop=True)
+    total = int(data[list(y_cols)].notna().sum().sum())
+    if total <= budget:
+        return data, total
+
+    if pd.api.types.is_numeric_dtype(data[x_col].dtype) or pd.api.types.is_datetime64_any_dtype(data[x_col].dtype):
+        data = data.sort_values(x_col, kind="stable")
+    groups = data.groupby(color_col, observed=True, sort=False) if color_col else [(None, data)]
+    max_rows = max(budget // max(len(y_cols), 1), 1)
+    n_series = len(y_cols) * (data[color_col].nunique() if color_col else 1)
+    per_series = max(3, max_rows // max(n_series, 1))
+
+    keep = []
+    for _, group in groups:
+        x = _axis_values(group[x_col])
+        for y_col in y_cols:
+            y = group[y_col].to_numpy(dtype="float64", na_value=np.nan)
+            valid = np.flatnonzero(~np.isnan(y) & ~np.isnan(x))
+            if method == "LTTB":
+                picked = lttb_indices(x[valid], y[valid], per_series)
+            else:
+                picked = minmax_indices(y[valid], per_series)
+            keep.append(group.index.to_numpy()[valid[picked]])
+    rows = np.concatenate(keep) if keep else np.array([], dtype=np.int64)
+    # Boolean selection keeps the x-sorted order
+    kept = data[data.index.isin(rows)]
+    if len(kept) > max_rows:
+        # The 3-point floor per series can overshoot with many series; thin evenly along x
+        kept = kept.iloc[np.linspace(0, len(kept) - 1, max_rows).round().astype(int)]
+    return kept, total
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def sample_scatter(_df, version, x_col, y_col, color_col, size_col, budget: int, seed: int = 0):
+    """Stratified sample of scatter data; returns ``(frame, total_points)``.
+
+    Strata are the color groups, or a coarse 2-D grid over x/y without a color. While
+    there are no more strata than the budget, every stratum keeps at least one point so
+    sparse regions and outliers survive; the sample never exceeds ``budget`` rows.
+    """
+    columns = list(dict.fromkeys([c for c in (x_col, y_col, color_col, size_col) if c]))
+    data = _df[columns].dropna(subset=[x_col, y_col])
+    total = len(data)
+    if total <= budget:
+        return data, total
+
+    if color_col:
+        strata, _ = pd.factorize(data[color_col])
+    else:
+        x = _axis_values(data[x_col])
+        y = _axis_values(data[y_col])
+        x_bin = np.digitize(x, np.linspace(x.min(), x.max(), SCATTER_STRATA_BINS + 1)[1:-1])
+        y_bin = np.digitize(y, np.linspace(y.min(), y.max(), SCATTER_STRATA_BINS + 1)[1:-1])
+        strata = x_bin * SCATTER_STRATA_BINS + y_bin
+    strata = strata + 1  # factorize marks nulls as -1
+
+    counts = np.bincount(strata)
+    occupied = (counts > 0).astype(np.int64)
+    rng = np.random.default_rng(seed)
+    if occupied.sum() <= budget:
+        # One point per stratum, the rest of the budget shared in proportion to what is left
+        base, weights, spare = occupied, counts - occupied, budget - occupied.sum()
+    else:
+        base, weights, spare = np.zeros_like(counts), counts, budget
+    share = weights * spare / weights.sum()
+    quota = base + np.floor(share).astype(np.int64)
+    # Hand the rounding leftovers to the largest remainders (ties broken at random)
+    leftover = budget - quota.sum()
+    if leftover > 0:
+        remainder = share - np.floor(share) + rng.random(len(share)) * 1e-9
+        quota[np.argsort(-remainder)[:leftover]] += 1
+    quota = np.minimum(quota, counts)
+    # Random rank of each row within its stratum; keep the first ``quota`` of each
+    priority = rng.random(total)
+    order = np.lexsort((priority, strata))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.empty(total, dtype=np.int64)
+    rank[order] = np.arange(total) - starts[strata[order]]
+    return data[rank < quota[strata]], total
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def density_grid(_df, version, x_col, y_col, bins: int = DENSITY_BINS):
+    """2-D histogram of x/y; returns ``(counts, x_centers, y_centers, total_points)``."""
+    x = _df[x_col].to_numpy(dtype="float64", na_value=np.nan)
+    y = _df[y_col].to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return counts.T, x_centers, y_centers, int(valid.sum())
+
+
+AGGREGATES = ["sum", "mean", "count", "median"]
+
+
+def aggregate_column(by: tuple, value_col, agg: str) -> str:
+    """Name of the value column in an ``aggregate`` result, kept apart from the group columns."""
+    name = "count" if value_col is None else value_col
+    if name in by:
+        name = f"{'count' if value_col is None else agg}({name})"
+    return name
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def aggregate(_df, version, by: tuple, value_col, agg: str) -> pd.DataFrame:
+    """Group ``value_col`` by the ``by`` columns; ``value_col=None`` counts rows.
+
+    Bar charts (x, color) and pie charts (names) share entries whenever their keys
+    coincide, and switching back to an earlier color or aggregate is a cache hit.
+    The value column is named by ``aggregate_column``, so grouping a column by
+    itself does not clash with the group key.
+    """
+    grouped = _df.groupby(list(by), observed=True, sort=True)
+    name = aggregate_column(by, value_col, agg)
+    if value_col is None:
+        return grouped.size().rename(name).reset_index()
+    return grouped[value_col].agg(agg).rename(name).reset_index()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def box_stats(_df, version, y_col, by: tuple) -> pd.DataFrame:
+    """Quartiles and 1.5×IQR whiskers of ``y_col`` for each group of the ``by`` columns.
+
+    Text values are read as numbers where they parse; a column with none raises ValueError.
+    """
+    values = pd.to_numeric(_df[y_col], errors="coerce").astype("float64")
+    if not values.notna().any():
+        raise ValueError(f"'{y_col}' has no numeric values to plot")
+    if by:
+        keys = [_df[c] for c in by]
+        grouped = values.groupby(keys, observed=True, sort=True)
+        q1_rows = grouped.transform("quantile", 0.25)
+        q3_rows = grouped.transform("quantile", 0.75)
+    else:
+        keys = np.zeros(len(values), dtype=np.int8)
+        grouped = values.groupby(keys)
+        q1_rows = pd.Series(values.quantile(0.25), index=values.index)
+        q3_rows = pd.Series(values.quantile(0.75), index=values.index)
+
+    iqr = q3_rows - q1_rows
+    # Whiskers end at the most extreme observations still inside the fences
+    inside = values.between(q1_rows - 1.5 * iqr, q3_rows + 1.5 * iqr)
+    fenced = values.where(inside).groupby(keys, observed=True, sort=True)
+    stats = pd.DataFrame({
+        "q1": grouped.quantile(0.25),
+        "median": grouped.median(),
+        "q3": grouped.quantile(0.75),
+        "lowerfence": fenced.min(),
+        "upperfence": fenced.max(),
+        "count": grouped.count(),
+    })
+    if not by:
+        return stats.reset_index(drop=True)
+    stats.index.names = list(by)
+    return stats.reset_index()
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def sorted_groups(_df, version, column, color_col) -> list:
+    """``[(group, sorted_values)]`` of a numeric or datetime column, one entry without color.
+
+    Held with ``cache_resource`` so the large arrays are shared rather than copied on
+    every hit; callers must treat them as read-only.
+    """
+    series = _df[column]
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        values = series.to_numpy().astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+        values[series.isna().to_numpy()] = np.nan
+    else:
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(values)
+    if color_col is None:
+        return [(None, np.sort(values[valid]))]
+
+    codes, uniques = pd.factorize(_df[color_col], sort=True)
+    valid &= codes >= 0
+    values, codes = values[valid], codes[valid]
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    bounds = np.searchsorted(codes, np.arange(len(uniques) + 1))
+    return [(uniques[i], values[bounds[i]:bounds[i + 1]]) for i in range(len(uniques))]
+
+
+def histogram(_df, version, column, bins: int, color_col=None):
+    """Bin edges and per-group counts; returns ``(edges, [(group, counts)])``.
+
+    Binning is two binary searches per group over the cached sorted values, so
+    changing ``bins`` never rescans the column.
+    """
+    groups = sorted_groups(_df, version, column, color_col)
+    non_empty = [values for _, values in groups if len(values)]
+    if not non_empty:
+        return np.array([0.0, 1.0]), [(name, np.zeros(1, dtype=np.int64)) for name, _ in groups]
+    low = min(values[0] for values in non_empty)
+    high = max(values[-1] for values in non_empty)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    edges = np.linspace(low, high, bins + 1)
+
+    counts = []
+    for name, values in groups:
+        positions = np.searchsorted(values, edges, side="left")
+        positions[-1] = len(values)  # the last bin includes the maximum
+        counts.append((name, np.diff(positions)))
+    return edges, counts
+
+
+# Cell labels are dropped above this many columns
+CORR_ANNOTATION_MAX = 20
+CORR_SAMPLE_ROWS = 200_000
+
+
+def _pairwise_pearson(values: np.ndarray) -> np.ndarray:
+    """Pearson correlation over pairwise-complete rows, using only matrix products."""
+    present = ~np.isnan(values)
+    # Shifting by the column mean changes nothing below but keeps the sums small
+    centered = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+    weights = present.astype(np.float64)
+    n = weights.T @ weights
+    sum_x = centered.T @ weights
+    sum_xx = (centered**2).T @ weights
+    sum_xy = centered.T @ centered
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x**2 / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[n < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def correlation_matrix(_df, version, columns: tuple, method: str = "pearson", sample_rows: int | None = None):
+    """Correlation matrix of ``columns``; returns ``(matrix, rows_used)``.
+
+    Spearman ranks each column once over all of its values and then applies the
+    pairwise Pearson path, which matches pandas exactly when there are no nulls.
+    ``sample_rows`` caps the rows used with a seeded uniform sample.
+    """
+    data = _df[list(columns)]
+    if sample_rows and len(data) > sample_rows:
+        picked = np.sort(np.random.default_rng(0).choice(len(data), sample_rows, replace=False))
+        data = data.iloc[picked]
+    if method == "spearman":
+        data = data.rank()
+    values = data.to_numpy(dtype="float64", na_value=np.nan)
+    corr = _pairwise_pearson(values)
+    return pd.DataFrame(corr, index=list(columns), columns=list(columns)), len(data)
+
+
+def strongest_pairs(corr: pd.DataFrame, k: int) -> pd.DataFrame:
+    """The ``k`` column pairs with the largest absolute correlation."""
+    upper = np.triu_indices(len(corr), k=1)
+    values = corr.to_numpy()[upper]
+    keep = ~np.isnan(values)
+    order = np.argsort(-np.abs(values[keep]), kind="stable")[:k]
+    rows, cols = upper[0][keep][order], upper[1][keep][order]
+    return pd.DataFrame({
+        "Column A": corr.index[rows],
+        "Column B": corr.columns[cols],
+        "Correlation": values[keep][order],
+    })
+
+
+RESAMPLE_FREQUENCIES = {"Minute": "min", "Hour": "h", "Day": "D", "Week": "W"}
+
+
+def is_datetime_like(series: pd.Series) -> bool:
+    """True for datetime columns and text columns whose values parse as dates."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return True
+    return is_text(series) and date_format(series) is not None
+
+
+def _as_datetime(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series
+    return pd.to_datetime(series, format=date_format(series), errors="coerce")
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def time_span(_df, version, x_col):
+    """``(first, last)`` timestamps of a datetime-like column."""
+    times = _as_datetime(_df[x_col])
+    return times.min(), times.max()
+
+
+def auto_frequency(first, last, target_points: int) -> str:
+    """Finest of the resample frequencies whose bucket count fits ``target_points``."""
+    span = last - first
+    for label, freq in RESAMPLE_FREQUENCIES.items():
+        if span / pd.Timedelta(1, unit=freq) <= target_points:
+            return label
+    return list(RESAMPLE_FREQUENCIES)[-1]
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def resample_series(_df, version, x_col, y_cols: tuple, color_col, frequency: str, agg: str) -> pd.DataFrame:
+    """Aggregate ``y_cols`` into fixed time buckets of ``frequency``, per color group if given."""
+    columns = list(dict.fromkeys([*y_cols] + ([color_col] if color_col else [])))
+    data = _df[columns].assign(**{x_col: _as_datetime(_df[x_col])}).dropna(subset=[x_col])
+    keys = [pd.Grouper(key=x_col, freq=RESAMPLE_FREQUENCIES[frequency])]
+    if color_col:
+        keys.append(color_col)
+    resampled = data.groupby(keys, observed=True)[list(y_cols)].agg(agg).reset_index()
+    if agg != "count":
+        # Empty buckets aggregate to NaN (or 0 for sum); drop them rather than plot gaps as zeros
+        counts = data.groupby(keys, observed=True)[list(y_cols)].count().reset_index()
+        resampled[list(y_cols)] = resampled[list(y_cols)].where(counts[list(y_cols)] > 0)
+    return resampled
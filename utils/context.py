@@ -0,0 +1,105 @@
+"""Data context handed to the chatbot, sized to a token budget and cached per dataset version."""
+
+import pandas as pd
+import streamlit as st
+
+from utils.dataset import dataset_version
+from utils.profile import column_profile, describe_numeric, is_numeric
+
+CONTEXT_TOKEN_BUDGET = 2000
+CHARS_PER_TOKEN = 4
+SAMPLE_ROWS = 3
+SAMPLE_CELL_CHARS = 40
+OMITTED_NAMES_CHARS = 240
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text and tables (about four characters per token)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _number(value) -> str:
+    return "n/a" if pd.isna(value) else f"{float(value):.2f}"
+
+
+def _column_line(col, stats, series: pd.Series) -> str:
+    dtype, nulls = stats["dtype"], stats["nulls"]
+    if is_numeric(series):
+        return (f"- {col} ({dtype}): min={_number(stats['min'])}, max={_number(stats['max'])}, "
+                f"mean={_number(stats['mean'])}, null={nulls}\n")
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return f"- {col} ({dtype}): from {stats['min']} to {stats['max']}, null={nulls}\n"
+    return f"- {col} ({dtype}): {stats['unique']} unique values, null={nulls}\n"
+
+
+def _omitted_summary(df: pd.DataFrame, columns: list) -> str:
+    """One line standing in for the columns that did not fit the budget."""
+    kinds = {"numeric": 0, "datetime": 0, "other": 0}
+    for col in columns:
+        if is_numeric(df[col]):
+            kinds["numeric"] += 1
+        elif pd.api.types.is_datetime64_any_dtype(df[col].dtype):
+            kinds["datetime"] += 1
+        else:
+            kinds["other"] += 1
+    parts = ", ".join(f"{n} {kind}" for kind, n in kinds.items() if n)
+    names = ", ".join(map(str, columns))
+    if len(names) > OMITTED_NAMES_CHARS:
+        names = names[:OMITTED_NAMES_CHARS].rsplit(", ", 1)[0] + ", ..."
+    return f"- ... {len(columns)} more columns ({parts}): {names}\n"
+
+
+def _build(df: pd.DataFrame, filename: str, budget: int) -> str:
+    max_chars = budget * CHARS_PER_TOKEN
+    header = (f"\n\n--- UPLOADED DATA CONTEXT ---\n"
+              f"File: {filename}\n"
+              f"Rows: {len(df)}, Columns: {len(df.columns)}\n\n"
+              f"Columns:\n")
+    footer = "--- END DATA CONTEXT ---\n\n"
+    used = len(header) + len(footer)
+
+    # Column lines come first; whatever doesn't fit is summarized in a single line
+    profile = column_profile()
+    columns = list(df.columns)
+    reserve = OMITTED_NAMES_CHARS + 80
+    lines, shown = [], []
+    for col in columns:
+        line = _column_line(col, profile.loc[col], df[col])
+        more = len(shown) + 1 < len(columns)
+        if shown and used + len(line) + (reserve if more else 0) > max_chars:
+            break
+        lines.append(line)
+        shown.append(col)
+        used += len(line)
+    if len(shown) < len(columns):
+        lines.append(_omitted_summary(df, columns[len(shown):]))
+        used += len(lines[-1])
+    body = "".join(lines)
+
+    # Sample rows and the numeric summary are extras, added only while they fit
+    sample = df[shown].head(SAMPLE_ROWS).astype(str).apply(lambda s: s.str.slice(0, SAMPLE_CELL_CHARS))
+    sample_text = f"\nFirst {SAMPLE_ROWS} rows:\n{sample.to_string()}\n"
+    if used + len(sample_text) <= max_chars:
+        body += sample_text
+        used += len(sample_text)
+
+    numeric_cols = [c for c in shown if is_numeric(df[c])]
+    if numeric_cols:
+        summary_text = f"\nNumeric Summary:\n{describe_numeric(numeric_cols).to_string()}\n"
+        if used + len(summary_text) <= max_chars:
+            body += summary_text
+
+    return header + body + footer
+
+
+def data_context(budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Context block describing the session dataset, rebuilt only when the data or budget changes."""
+    if st.session_state.df is None:
+        return ""
+    key = (dataset_version(), budget)
+    cached = st.session_state.get("data_context")
+    if cached is None or cached["key"] != key:
+        text = _build(st.session_state.df, st.session_state.uploaded_filename, budget)
+        cached = {"key": key, "text": text}
+        st.session_state.data_context = cached
+    return cached["text"]
@@ -0,0 +1,63 @@
+"""Session dataset bookkeeping shared by all pages."""
+
+import hashlib
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def content_hash(file, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hash a file-like object's bytes in chunks and rewind it."""
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    while chunk := file.read(chunk_size):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Deep memory footprint of a DataFrame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def set_dataset(
+    df: pd.DataFrame,
+    name: str,
+    version: str | None = None,
+    parent: str | None = None,
+    changed_columns: list | None = None,
+):
+    """Make ``df`` the session dataset under a new version token.
+
+    When the new frame is derived from the current one, pass the ``parent`` version
+    and the ``changed_columns`` so per-column caches can keep the untouched columns.
+    """
+    st.session_state.df = df
+    st.session_state.uploaded_filename = name
+    st.session_state.df_version = version or uuid.uuid4().hex
+    st.session_state.df_lineage = {
+        "version": st.session_state.df_version,
+        "parent": parent,
+        "changed": set(changed_columns or ()),
+    }
+
+
+def dataset_version() -> str | None:
+    """Version token of the current session dataset, or None if nothing is loaded."""
+    if st.session_state.get("df") is None:
+        return None
+    return st.session_state.get("df_version")
+
+
+def dataset_nbytes() -> int:
+    """Memory footprint of the session dataset, measured once per version."""
+    version = st.session_state.get("df_version")
+    cached = st.session_state.get("df_nbytes")
+    if cached is None or cached[0] != version:
+        cached = (version, frame_nbytes(st.session_state.df))
+        st.session_state.df_nbytes = cached
+    return cached[1]
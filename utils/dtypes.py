@@ -0,0 +1,186 @@
+"""Dtype inference and downcasting helpers."""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRING = pd.StringDtype("pyarrow")
+except ImportError:
+    ARROW_STRING = None
+
+# Strings whose distinct count is at most this share of the non-null values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+# Share of sampled values that must parse before a text column is treated as dates
+DATE_MIN_PARSE_RATIO = 0.9
+DATE_SAMPLE_SIZE = 1000
+# A guessed date format must pin down at least the year and the month
+DATE_YEAR_DIRECTIVES = ("%Y", "%y")
+DATE_MONTH_DIRECTIVES = ("%m", "%b", "%B")
+
+
+def is_text(series: pd.Series) -> bool:
+    """True for object and string columns (not categoricals)."""
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def is_string_column(series: pd.Series) -> bool:
+    """True for text columns that hold only strings (not lists, dicts or mixed objects)."""
+    return is_text(series) and pd.api.types.infer_dtype(series, skipna=True) == "string"
+
+
+def downcast_numeric(series: pd.Series) -> pd.Series:
+    """Shrink an int or float column to the smallest dtype that holds it losslessly."""
+    if pd.api.types.is_bool_dtype(series.dtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        unsigned = len(series) > 0 and series.min() >= 0
+        return pd.to_numeric(series, downcast="unsigned" if unsigned else "integer")
+    if series.dtype == np.float64:
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32)
+        # Only narrow when every value round-trips exactly (NaN compares unequal, so mask it)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return pd.Series(narrowed, index=series.index, name=series.name)
+    return series
+
+
+def nunique(series: pd.Series) -> int:
+    """Distinct non-null values, comparing unhashable cells (lists, dicts) by their text."""
+    try:
+        return series.nunique()
+    except TypeError:
+        return series.dropna().astype(str).nunique()
+
+
+def is_hashable(series: pd.Series) -> bool:
+    """False for object columns holding lists or dicts, which pandas cannot hash."""
+    try:
+        series.head(1000).nunique()
+    except TypeError:
+        return False
+    return True
+
+
+def should_categorize(series: pd.Series, max_ratio: float = CATEGORY_MAX_RATIO) -> bool:
+    """True when a text column repeats its values enough for a categorical to pay off."""
+    non_null = series.count()
+    return non_null > 0 and is_hashable(series) and nunique(series) <= non_null * max_ratio
+
+
+def infer_column_plan(sample: pd.DataFrame, max_ratio: float = CATEGORY_MAX_RATIO) -> dict:
+    """Decide a target kind per column ("numeric" or "category") from a leading sample."""
+    plan = {}
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            plan[col] = "numeric"
+        elif is_string_column(series) and should_categorize(series, max_ratio):
+            plan[col] = "category"
+    return plan
+
+
+def apply_column_plan(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """Downcast numerics and categorize text columns of ``df`` according to ``plan``."""
+    for col, kind in plan.items():
+        if col not in df.columns:
+            continue
+        if kind == "numeric":
+            df[col] = downcast_numeric(df[col])
+        elif kind == "category" and is_text(df[col]):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate parsed chunks, unifying categorical columns so they stay categorical."""
+    if not chunks:
+        return pd.DataFrame()
+    # Columns can come and go between chunks (e.g. keys missing from some JSON batches)
+    columns = dict.fromkeys(col for chunk in chunks for col in chunk.columns)
+    for col in columns:
+        having = [chunk for chunk in chunks if col in chunk.columns]
+        if not all(isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in having):
+            continue
+        categories = having[0][col].cat.categories
+        for chunk in having[1:]:
+            categories = categories.union(chunk[col].cat.categories)
+        for chunk in having:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def date_format(series: pd.Series, sample_size: int = DATE_SAMPLE_SIZE) -> str | None:
+    """Return the strftime format of a date-like text column, or None if it isn't one."""
+    sample = series.dropna().head(sample_size).astype(str)
+    if sample.empty:
+        return None
+    fmt = guess_datetime_format(sample.iloc[0])
+    if fmt is None:
+        return None
+    # Bare years ("2001") and times are left as they are
+    if not any(d in fmt for d in DATE_YEAR_DIRECTIVES) or not any(d in fmt for d in DATE_MONTH_DIRECTIVES):
+        return None
+    parsed = pd.to_datetime(sample, format=fmt, errors="coerce")
+    return fmt if parsed.notna().mean() >= DATE_MIN_PARSE_RATIO else None
+
+
+def parse_dates(series: pd.Series) -> pd.Series | None:
+    """Datetime copy of a date-like text or categorical column, or None if it isn't one.
+
+    The column is only converted when every non-null value parses with the guessed
+    format, so no value is silently turned into NaT.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Parse each distinct value once; the CSV ingest plan categorizes repeated dates
+        parsed = parse_dates(pd.Series(series.cat.categories))
+        if parsed is None:
+            return None
+        values = pd.DatetimeIndex(parsed).take(series.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT)
+        return pd.Series(values, index=series.index, name=series.name)
+    if not is_string_column(series):
+        return None
+    fmt = date_format(series)
+    if fmt is None:
+        return None
+    parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+    return parsed if parsed.isna().sum() == series.isna().sum() else None
+
+
+def optimize_dtypes(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Return a compacted copy of ``df`` and a per-column before/after memory report.
+
+    Integers and floats are downcast losslessly, date-like text and categoricals whose
+    values all parse are converted to datetimes, repeated strings become categoricals and the remaining text moves to
+    Arrow-backed strings when pyarrow is installed. Object columns holding anything
+    other than strings (lists, dicts, mixed values) are left untouched.
+    """
+    optimized = {}
+    rows = []
+    for col in df.columns:
+        series = df[col]
+        before = series.memory_usage(deep=True, index=False)
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            new = downcast_numeric(series)
+        elif (dates := parse_dates(series)) is not None:
+            new = dates
+        elif is_string_column(series):
+            if should_categorize(series):
+                new = series.astype("category")
+            elif ARROW_STRING is not None and series.dtype != ARROW_STRING:
+                new = series.astype(ARROW_STRING)
+            else:
+                new = series
+        else:
+            new = series
+        optimized[col] = new
+        rows.append({
+            "Column": col,
+            "Before": str(series.dtype),
+            "After": str(new.dtype),
+            "Before MB": before / 1024**2,
+            "After MB": new.memory_usage(deep=True, index=False) / 1024**2,
+        })
+    result = pd.DataFrame(optimized, index=df.index)
+    return result, pd.DataFrame(rows)
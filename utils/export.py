@@ -0,0 +1,116 @@
+"""On-demand dataset exports, written in row chunks and cached per dataset version."""
+
+import gzip
+import io
+
+import pandas as pd
+import streamlit as st
+
+from utils.cache import LRUCache
+
+EXPORT_CACHE_MAX_BYTES = 512 * 1024**2
+EXPORT_CHUNK_ROWS = 100_000
+GZIP_LEVEL = 6
+
+EXPORT_FORMATS = {
+    "CSV": {"ext": "csv", "mime": "text/csv"},
+    "CSV (gzip)": {"ext": "csv.gz", "mime": "application/gzip"},
+    "JSON": {"ext": "json", "mime": "application/json"},
+    "Parquet": {"ext": "parquet", "mime": "application/vnd.apache.parquet", "requires": "pyarrow"},
+    "Excel": {
+        "ext": "xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "requires": "openpyxl",
+    },
+}
+
+
+@st.cache_resource
+def get_export_cache() -> LRUCache:
+    """Process-wide cache of generated export files keyed by dataset version and format."""
+    return LRUCache(EXPORT_CACHE_MAX_BYTES)
+
+
+def _chunks(df: pd.DataFrame):
+    rows = EXPORT_CHUNK_ROWS
+    for start in range(0, len(df), rows):
+        yield start, df.iloc[start:start + rows]
+
+
+def _write_csv(df, out):
+    if df.empty:
+        out.write(df.to_csv(index=False).encode())
+    for start, chunk in _chunks(df):
+        out.write(chunk.to_csv(index=False, header=start == 0).encode())
+
+
+def _write_json(df, out):
+    out.write(b"[")
+    for start, chunk in _chunks(df):
+        # Each chunk renders as a full array; splice its records into the outer one
+        records = chunk.to_json(orient="records", indent=2).strip()[1:-1].strip("\n")
+        out.write((",\n" if start else "\n").encode() + records.encode())
+    out.write(b"\n]")
+
+
+def _write_parquet(df, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for _, chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_excel(df, out, stats=None):
+    with pd.ExcelWriter(out, engine="openpyxl") as writer:
+        if df.empty:
+            df.to_excel(writer, sheet_name="Data", index=False)
+        for start, chunk in _chunks(df):
+            chunk.to_excel(
+                writer, sheet_name="Data", index=False,
+                header=start == 0, startrow=start + 1 if start else 0,
+            )
+        if stats is not None and not stats.empty:
+            stats.to_excel(writer, sheet_name="Statistics")
+
+
+def export_available(fmt: str) -> bool:
+    """False when the optional library a format needs is not installed."""
+    module = EXPORT_FORMATS[fmt].get("requires")
+    if module is None:
+        return True
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def build_export(df: pd.DataFrame, version: str, fmt: str, stats=None) -> bytes:
+    """Return the export file for ``df`` in ``fmt``, generating it only on first request."""
+    cache = get_export_cache()
+    key = (version, fmt)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    out = io.BytesIO()
+    if fmt == "CSV":
+        _write_csv(df, out)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=GZIP_LEVEL) as gz:
+            _write_csv(df, gz)
+    elif fmt == "JSON":
+        _write_json(df, out)
+    elif fmt == "Parquet":
+        _write_parquet(df, out)
+    elif fmt == "Excel":
+        _write_excel(df, out, stats)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    data = out.getvalue()
+    cache.put(key, data, len(data))
+    return data
@@ -0,0 +1,150 @@
+"""Indexed multi-column filtering for the Data Explorer."""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cache import LRUCache
+from utils.dataset import dataset_version
+
+MASK_CACHE_MAX_BYTES = 128 * 1024**2
+# Above this many selected values a vectorized isin over the codes beats OR-ing bitmaps
+MAX_BITMAP_VALUES = 32
+
+
+def _store() -> dict:
+    """Per-session indexes and masks for the current dataset version."""
+    version = dataset_version()
+    store = st.session_state.get("filter_index")
+    if store is None or store["version"] != version:
+        store = {
+            "version": version,
+            "sorted": {},
+            "codes": {},
+            "bitmaps": LRUCache(MASK_CACHE_MAX_BYTES),
+            "masks": LRUCache(MASK_CACHE_MAX_BYTES),
+            "last": None,
+        }
+        st.session_state.filter_index = store
+    return store
+
+
+def filter_kind(series: pd.Series) -> str:
+    """"range" for numbers and datetimes, "in" for everything else."""
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return "in"
+    if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return "range"
+    return "in"
+
+
+def sorted_index(df: pd.DataFrame, column) -> tuple[np.ndarray, np.ndarray]:
+    """``(sorted_values, positions)`` of the non-null values of a range column."""
+    store = _store()
+    if column not in store["sorted"]:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = series.to_numpy()
+        else:
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+        present = np.flatnonzero(series.notna().to_numpy())
+        positions = present[np.argsort(values[present], kind="stable")]
+        store["sorted"][column] = (values[positions], positions)
+    return store["sorted"][column]
+
+
+def category_codes(df: pd.DataFrame, column) -> tuple[np.ndarray, list]:
+    """``(codes, uniques)`` of an equality column; uniques are sorted and nulls are -1."""
+    store = _store()
+    if column not in store["codes"]:
+        series = df[column]
+        try:
+            codes, uniques = pd.factorize(series, sort=True)
+        except TypeError:
+            # Lists or dicts in cells: compare them by their text form
+            codes, uniques = pd.factorize(series.astype(str), sort=True)
+        store["codes"][column] = (codes, list(uniques))
+    return store["codes"][column]
+
+
+def unique_values(df: pd.DataFrame, column) -> list:
+    """Sorted distinct values of a column, computed once per version."""
+    return category_codes(df, column)[1]
+
+
+def value_range(df: pd.DataFrame, column):
+    """``(min, max)`` of a range column read off its sorted index, or None if all null."""
+    values, _ = sorted_index(df, column)
+    if len(values) == 0:
+        return None
+    return values[0], values[-1]
+
+
+def _range_mask(df, column, low, high) -> np.ndarray:
+    values, positions = sorted_index(df, column)
+    if np.issubdtype(values.dtype, np.datetime64):
+        low, high = np.datetime64(pd.Timestamp(low)), np.datetime64(pd.Timestamp(high))
+    start = np.searchsorted(values, low, side="left")
+    stop = np.searchsorted(values, high, side="right")
+    mask = np.zeros(len(df), dtype=bool)
+    mask[positions[start:stop]] = True
+    return mask
+
+
+def _bitmap(store, column, codes, code) -> np.ndarray:
+    """Packed row bitmap of one category code."""
+    key = (column, code)
+    bitmap = store["bitmaps"].get(key)
+    if bitmap is None:
+        bitmap = np.packbits(codes == code)
+        store["bitmaps"].put(key, bitmap, bitmap.nbytes)
+    return bitmap
+
+
+def _in_mask(df, column, values) -> np.ndarray:
+    store = _store()
+    codes, uniques = category_codes(df, column)
+    lookup = {v: i for i, v in enumerate(uniques)}
+    wanted = [lookup[v] for v in values if v in lookup]
+    if len(wanted) > MAX_BITMAP_VALUES:
+        return np.isin(codes, wanted)
+    packed = np.zeros((len(codes) + 7) // 8, dtype=np.uint8)
+    for code in wanted:
+        np.bitwise_or(packed, _bitmap(store, column, codes, code), out=packed)
+    return np.unpackbits(packed, count=len(codes)).astype(bool)
+
+
+def predicate_mask(df: pd.DataFrame, predicate: tuple) -> np.ndarray:
+    """Row mask for one ``(column, kind, value)`` predicate, cached by its definition."""
+    store = _store()
+    mask = store["masks"].get(predicate)
+    if mask is None:
+        column, kind, value = predicate
+        if kind == "range":
+            mask = _range_mask(df, column, *value)
+        else:
+            mask = _in_mask(df, column, value)
+        store["masks"].put(predicate, mask, mask.nbytes)
+    return mask
+
+
+def filter_positions(df: pd.DataFrame, predicates: list) -> np.ndarray | None:
+    """Row positions matching all predicates, or None when nothing is filtered.
+
+    Each predicate is ``(column, "range", (low, high))`` or ``(column, "in", values)``
+    with hashable values. Per-predicate masks are cached, so changing one predicate
+    only recomputes that mask before the cheap in-place AND.
+    """
+    if not predicates:
+        return None
+    store = _store()
+    key = tuple(predicates)
+    if store["last"] is not None and store["last"][0] == key:
+        return store["last"][1]
+
+    combined = predicate_mask(df, predicates[0]).copy()
+    for predicate in predicates[1:]:
+        np.logical_and(combined, predicate_mask(df, predicate), out=combined)
+    positions = np.flatnonzero(combined)
+    store["last"] = (key, positions)
+    return positions
@@ -0,0 +1,105 @@
+"""Paged data grid that only sends the visible window of rows to the browser."""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cache import LRUCache
+from utils.dataset import dataset_version
+from utils.preferences import get_preference
+
+SORT_CACHE_MAX_BYTES = 256 * 1024**2
+NO_SORT = "(original order)"
+
+
+def _sort_cache() -> LRUCache:
+    """Per-session cache of sort orders for the current dataset version."""
+    version = dataset_version()
+    state = st.session_state.get("grid_sort_cache")
+    if state is None or state["version"] != version:
+        state = {"version": version, "cache": LRUCache(SORT_CACHE_MAX_BYTES)}
+        st.session_state.grid_sort_cache = state
+    return state["cache"]
+
+
+def sort_order(df: pd.DataFrame, column, ascending: bool) -> np.ndarray:
+    """Row positions of ``df`` sorted by ``column`` (nulls last), cached per version."""
+    cache = _sort_cache()
+    key = (column, ascending)
+    order = cache.get(key)
+    if order is None:
+        series = df[column].reset_index(drop=True)
+        try:
+            ordered = series.sort_values(ascending=ascending, na_position="last", kind="stable")
+        except TypeError:
+            # Mixed or unhashable cells: fall back to sorting their text form
+            ordered = series.astype(str).sort_values(ascending=ascending, kind="stable")
+        order = ordered.index.to_numpy()
+        cache.put(key, order, order.nbytes)
+    return order
+
+
+def _persisted(key: str, name: str, default):
+    """Seed a widget from state that outlives the widget (e.g. across page switches)."""
+    widget_key = f"{key}_{name}"
+    store = st.session_state.setdefault(f"{key}_grid_state", {})
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = store.get(name, default)
+    return widget_key
+
+
+def _remember(key: str, name: str):
+    st.session_state[f"{key}_grid_state"][name] = st.session_state[f"{key}_{name}"]
+
+
+def paged_dataframe(df: pd.DataFrame, key: str, positions=None, columns=None, height: int = 400):
+    """Render one page of the session dataset ``df`` with server-side sorting and paging.
+
+    ``positions`` restricts the grid to a subset of row positions (e.g. a filter
+    result) and ``columns`` to a subset of columns; neither is materialized beyond
+    the visible page. Page size defaults to the ``max_rows`` preference.
+    """
+    columns = list(df.columns if columns is None else columns)
+    total = len(df) if positions is None else len(positions)
+
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    with col1:
+        sort_key = _persisted(key, "sort", NO_SORT)
+        if st.session_state[sort_key] not in [NO_SORT] + columns:
+            st.session_state[sort_key] = NO_SORT
+        sort_col = st.selectbox("Sort by", [NO_SORT] + columns, key=sort_key,
+                                on_change=_remember, args=(key, "sort"))
+    with col2:
+        asc_key = _persisted(key, "ascending", True)
+        ascending = st.toggle("Ascending", key=asc_key, on_change=_remember, args=(key, "ascending"),
+                              disabled=sort_col == NO_SORT)
+    with col3:
+        size_key = _persisted(key, "page_size", int(get_preference("max_rows", 100)))
+        page_size = st.number_input("Rows per page", min_value=10, max_value=10000, step=10,
+                                    key=size_key, on_change=_remember, args=(key, "page_size"))
+    n_pages = max(1, -(-total // page_size))
+    with col4:
+        page_key = _persisted(key, "page", 1)
+        if st.session_state[page_key] > n_pages:
+            st.session_state[page_key] = n_pages
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, step=1,
+                               key=page_key, on_change=_remember, args=(key, "page"))
+
+    if sort_col == NO_SORT:
+        ordered = positions
+    else:
+        ordered = sort_order(df, sort_col, ascending)
+        if positions is not None:
+            keep = np.zeros(len(df), dtype=bool)
+            keep[positions] = True
+            ordered = ordered[keep[ordered]]
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total)
+    if ordered is None:
+        window = df.iloc[start:stop]
+    else:
+        window = df.iloc[ordered[start:stop]]
+
+    st.dataframe(window[columns], use_container_width=True, height=height)
+    st.caption(f"Rows {start + 1 if total else 0:,}–{stop:,} of {total:,}")
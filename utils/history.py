@@ -0,0 +1,69 @@
+"""Token-budgeted chat history: recent turns verbatim, older turns folded into a rolling summary."""
+
+import streamlit as st
+
+from utils.context import estimate_tokens
+
+HISTORY_TOKEN_BUDGET = 4000
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below for your own future reference. Keep every fact, number, "
+    "column name and decision the user may refer back to; drop pleasantries. "
+    "Answer with the summary only."
+)
+
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(message["content"]) + 4
+
+
+def summary_prompt(previous: str, turns: list) -> str:
+    """Prompt asking the model to fold ``turns`` into the existing summary."""
+    transcript = "\n\n".join(f"{m['role'].title()}: {m['content']}" for m in turns)
+    earlier = f"Summary so far:\n{previous}\n\n" if previous else ""
+    return f"{SUMMARY_INSTRUCTIONS}\n\n{earlier}Conversation:\n{transcript}"
+
+
+def reset_history() -> None:
+    st.session_state.pop("chat_summary", None)
+
+
+def _cutoff(messages: list, start: int, keep_tokens: int) -> int:
+    """First message to keep verbatim: the newest turns within ``keep_tokens``, starting on a user turn."""
+    total, cutoff = 0, len(messages) - 1
+    for i in range(len(messages) - 1, start - 1, -1):
+        total += message_tokens(messages[i])
+        if total > keep_tokens and i < len(messages) - 1:
+            break
+        cutoff = i
+    while cutoff < len(messages) - 1 and messages[cutoff]["role"] != "user":
+        cutoff += 1
+    return cutoff
+
+
+def windowed_history(messages: list, budget: int, summarize) -> list:
+    """History to send with the next request, kept within ``budget`` tokens.
+
+    Once the unsummarized turns exceed the budget, the oldest ones are passed to
+    ``summarize(previous_summary, turns)`` and replaced by its result. The window is cut
+    back to half the budget each time, so the summary is regenerated only every few turns
+    rather than on every message. If ``summarize`` returns None the old turns are dropped.
+    """
+    state = st.session_state.get("chat_summary")
+    if state is None or state["upto"] > len(messages):
+        state = st.session_state.chat_summary = {"text": "", "upto": 0}
+
+    if sum(message_tokens(m) for m in messages[state["upto"]:]) > budget:
+        cutoff = _cutoff(messages, state["upto"], budget // 2)
+        if cutoff > state["upto"]:
+            summary = summarize(state["text"], messages[state["upto"]:cutoff])
+            if summary is not None:
+                state["text"] = summary
+            state["upto"] = cutoff
+
+    history = []
+    if state["text"]:
+        history = [
+            {"role": "user", "content": f"Summary of our earlier conversation:\n{state['text']}"},
+            {"role": "assistant", "content": "Thanks, I'll keep that in mind."},
+        ]
+    return history + [{"role": m["role"], "content": m["content"]} for m in messages[state["upto"]:]]
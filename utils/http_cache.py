@@ -0,0 +1,301 @@
+"""On-disk HTTP cache for API Tools with ETag / Last-Modified revalidation."""
+
+import hashlib
+import json
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import requests
+import streamlit as st
+from requests.structures import CaseInsensitiveDict
+
+from utils.payload import SPILL_BYTES, Payload, download, file_payload
+from utils.response_cache import CACHE_DIR
+
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+# Responses that say nothing about freshness are checked with the server every time
+DEFAULT_FRESHNESS = 0
+# RFC 9111 heuristic: fresh for a tenth of the time since Last-Modified, at most a day
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_SECONDS = 86_400
+DEFAULT_MAX_MB = 200
+
+
+def _cache_control(headers) -> dict:
+    """Parse a Cache-Control header into ``{directive: value or True}``."""
+    directives = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if value else True
+    return directives
+
+
+def _seconds(value) -> float:
+    """A delta-seconds directive value; malformed ones count as 0."""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _http_date(value) -> float:
+    return parsedate_to_datetime(value).timestamp()
+
+
+def freshness_lifetime(headers, default: float) -> float:
+    """Seconds a response may be served without revalidation.
+
+    Taken from max-age or Expires; failing those, a tenth of the age of Last-Modified
+    (capped at a day); otherwise ``default``.
+    """
+    directives = _cache_control(headers)
+    if "no-cache" in directives:
+        return 0.0
+    if "max-age" in directives:
+        return _seconds(directives["max-age"])
+    if headers.get("Expires"):
+        try:
+            expires = _http_date(headers["Expires"])
+            date = _http_date(headers["Date"]) if headers.get("Date") else time.time()
+            return max(expires - date, 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+    if headers.get("Last-Modified"):
+        try:
+            date = _http_date(headers["Date"]) if headers.get("Date") else time.time()
+            age = date - _http_date(headers["Last-Modified"])
+            return min(max(age * HEURISTIC_FRACTION, 0.0), HEURISTIC_MAX_SECONDS)
+        except (TypeError, ValueError):
+            return 0.0
+    return float(default)
+
+
+def is_cacheable_request(method: str, json_body=None) -> bool:
+    """GETs, and GraphQL POSTs that are queries rather than mutations."""
+    if method.upper() == "GET":
+        return True
+    if method.upper() == "POST" and isinstance(json_body, dict) and isinstance(json_body.get("query"), str):
+        return not re.match(r"\s*(mutation|subscription)\b", json_body["query"])
+    return False
+
+
+def request_key(method: str, url: str, params=None, json_body=None, headers=None, auth=None) -> str:
+    """Hash of everything that can change the response; credentials are only ever stored hashed."""
+    parts = {
+        "method": method.upper(),
+        "url": url,
+        "params": sorted((params or {}).items()),
+        "json": json_body,
+        "headers": sorted((k.lower(), v) for k, v in (headers or {}).items()
+                          if k.lower() not in ("cache-control", "pragma")),
+        "auth": auth,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _build_response(url: str, status: int, reason: str, headers: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.url = url
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+class HTTPCache:
+    """Response bodies stored as files, indexed in SQLite, bounded by total size (least recently used go first)."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(directory / "index.sqlite3", check_same_thread=False)
+        self._lock = threading.Lock()
+        self.counts = {"HIT": 0, "MISS": 0, "REVALIDATED": 0, "BYPASS": 0}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, url TEXT, status INTEGER, reason TEXT, headers TEXT,"
+                " size INTEGER, stored REAL, lifetime REAL, accessed REAL)"
+            )
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.body"
+
+    def lookup(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, reason, headers, stored, lifetime FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not self._body_path(key).exists():
+            return None
+        url, status, reason, headers, stored, lifetime = row
+        return {"url": url, "status": status, "reason": reason, "headers": json.loads(headers),
+                "stored": stored, "lifetime": lifetime}
+
+    def payload(self, key: str, spill_bytes: int):
+        """Stored body, or None if it was evicted; large ones are handed out as the cache file itself."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        try:
+            return file_payload(str(self._body_path(key)), spill_bytes)
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, response: requests.Response, payload: Payload, lifetime: float,
+              max_bytes: int) -> Payload:
+        """Save a downloaded body; a spilled temp file is moved into the cache instead of copied."""
+        if payload.size > max_bytes:
+            return payload
+        path = self._body_path(key)
+        if payload.path is not None and payload.owned:
+            shutil.move(payload.path, path)
+            payload = Payload(payload.size, path=str(path))
+        elif payload.path is not None:
+            shutil.copyfile(payload.path, path)
+        else:
+            path.write_bytes(payload.data)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, response.reason, json.dumps(dict(response.headers)),
+                 payload.size, now, lifetime, now),
+            )
+            self._evict(max_bytes)
+        return payload
+
+    def refresh(self, key: str, headers, lifetime: float):
+        """Record a 304: merge the new headers and restart the freshness clock; None if the entry is gone."""
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        merged = CaseInsensitiveDict(entry["headers"])
+        merged.update({k: v for k, v in headers.items() if k.lower() not in ("content-length", "content-encoding")})
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET headers = ?, stored = ?, lifetime = ? WHERE key = ?",
+                (json.dumps(dict(merged)), time.time(), lifetime, key),
+            )
+        return dict(merged)
+
+    def _evict(self, max_bytes: int):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in stale])
+        for key in stale:
+            self._body_path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        with self._lock, self._conn:
+            keys = [row[0] for row in self._conn.execute("SELECT key FROM entries")]
+            self._conn.execute("DELETE FROM entries")
+        for key in keys:
+            self._body_path(key).unlink(missing_ok=True)
+        self.counts = dict.fromkeys(self.counts, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size, **self.counts}
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_cache() -> HTTPCache:
+    return HTTPCache(HTTP_CACHE_DIR)
+
+
+def cached_request(session: requests.Session, method: str, url: str, headers: dict = None, params: dict = None,
+                   json_body=None, auth=None, timeout: float = 30, enabled: bool = True,
+                   default_freshness: float = DEFAULT_FRESHNESS, max_bytes: int = DEFAULT_MAX_MB * 1024**2,
+                   spill_bytes: int = SPILL_BYTES, **kwargs) -> tuple:
+    """Send a request through the HTTP cache; returns ``(response, payload, status)``.
+
+    The body is streamed into a ``Payload`` (spilled to a temp file past ``spill_bytes``);
+    ``response.content`` is only filled in for bodies small enough to keep in memory.
+    ``status`` is HIT (fresh copy, no request sent), REVALIDATED (the server answered 304
+    to If-None-Match / If-Modified-Since), MISS (downloaded and stored if allowed) or
+    BYPASS (not cacheable, or caching is off). A request ``Cache-Control: max-age=N``
+    only accepts stored copies up to N seconds old; ``no-cache`` always revalidates.
+    The cache is shared by every session, so ``private`` responses are never stored.
+    """
+    headers = dict(headers or {})
+
+    def send(extra_headers=None):
+        return session.request(method, url, headers={**headers, **(extra_headers or {})}, params=params,
+                               json=json_body, auth=auth, timeout=timeout, stream=True, **kwargs)
+
+    def finish(response, payload, status):
+        response._content = payload.data if payload.data is not None else b""
+        response._content_consumed = True
+        return response, payload, status
+
+    cache = get_http_cache()
+    if not enabled or not is_cacheable_request(method, json_body):
+        cache.counts["BYPASS"] += 1
+        response = send()
+        return finish(response, download(response, spill_bytes), "BYPASS")
+
+    key = request_key(method, url, params, json_body, headers, auth)
+    entry = cache.lookup(key)
+    request_directives = _cache_control(CaseInsensitiveDict(headers))
+    max_age = _seconds(request_directives["max-age"]) if "max-age" in request_directives else None
+
+    response = None
+    if entry is not None:
+        age = time.time() - entry["stored"]
+        fresh = age < entry["lifetime"] and (max_age is None or age <= max_age)
+        if fresh and "no-cache" not in request_directives:
+            payload = cache.payload(key, spill_bytes)
+            if payload is not None:
+                cache.counts["HIT"] += 1
+                response = _build_response(entry["url"], entry["status"], entry["reason"], entry["headers"])
+                return finish(response, payload, "HIT")
+        else:
+            validators = {}
+            stored_headers = CaseInsensitiveDict(entry["headers"])
+            if stored_headers.get("ETag"):
+                validators["If-None-Match"] = stored_headers["ETag"]
+            if stored_headers.get("Last-Modified"):
+                validators["If-Modified-Since"] = stored_headers["Last-Modified"]
+            response = send(validators)
+            if response.status_code == 304:
+                response.close()
+                stored_headers.update(response.headers)
+                merged = cache.refresh(key, response.headers, freshness_lifetime(stored_headers, default_freshness))
+                payload = cache.payload(key, spill_bytes) if merged is not None else None
+                if payload is not None:
+                    cache.counts["REVALIDATED"] += 1
+                    rebuilt = _build_response(entry["url"], entry["status"], entry["reason"], merged)
+                    rebuilt.elapsed = response.elapsed
+                    return finish(rebuilt, payload, "REVALIDATED")
+                response = None
+    # No usable entry (including one evicted while we were looking at it): fetch in full
+    if response is None:
+        response = send()
+
+    cache.counts["MISS"] += 1
+    payload = download(response, spill_bytes)
+    lifetime = freshness_lifetime(response.headers, default_freshness)
+    # Nothing to gain from keeping a response that is never fresh and can't be revalidated
+    reusable = lifetime > 0 or response.headers.get("ETag") or response.headers.get("Last-Modified")
+    response_directives = _cache_control(response.headers)
+    # One cache serves every session, so a response meant for a single user must not land in it
+    storable = "no-store" not in response_directives and "private" not in response_directives \
+        and "no-store" not in request_directives
+    if response.status_code == 200 and reusable and storable:
+        payload = cache.store(key, response, payload, lifetime, max_bytes)
+    return finish(response, payload, "MISS")
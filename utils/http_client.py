@@ -0,0 +1,184 @@
+"""Pooled HTTP sessions and the concurrent batch runner used by API Tools."""
+
+import string
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from urllib.parse import quote, urlsplit
+
+import pandas as pd
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30
+MAX_BATCH_REQUESTS = 10_000
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_adapter(pool_size: int, retries: int, backoff: float) -> HTTPAdapter:
+    """Connection pool shared by every session and user; it holds no cookies or auth."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+
+
+def get_session(pool_size: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                backoff: float = DEFAULT_BACKOFF) -> requests.Session:
+    """Fresh session on the shared keep-alive pool, with a connection pool sized for ``pool_size`` workers.
+
+    Only the pool is shared: each session starts empty and refuses to store cookies,
+    so nothing set by one request is sent on another user's. Failed connections and
+    429/5xx responses are retried with exponential backoff, honoring ``Retry-After``,
+    for idempotent methods only (urllib3's default), so a POST is never sent twice.
+    """
+    adapter = _shared_adapter(pool_size, retries, backoff)
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HostRateLimiter:
+    """Spaces requests to each host at most ``rate`` per second across worker threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def template_fields(template: str) -> list:
+    """Placeholder names in a URL template such as ``https://api.example.com/users/{id}``."""
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+
+def expand_template(template: str, rows: list) -> list:
+    """Fill the template once per parameter row; values are URL-encoded."""
+    fields = template_fields(template)
+    jobs = []
+    for row in rows:
+        missing = [f for f in fields if f not in row]
+        if missing:
+            raise ValueError(f"Parameters {row} are missing {', '.join(missing)}")
+        jobs.append((template.format(**{f: quote(str(row[f]), safe="") for f in fields}), row))
+    return jobs
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a batch."""
+
+    index: int
+    url: str
+    params: dict
+    status: int | None = None
+    latency: float = 0.0
+    retries: int = 0
+    payload: object = None
+    error: str | None = None
+
+
+def _fetch(session, limiter, index, url, params, method, headers, timeout) -> BatchResult:
+    result = BatchResult(index, url, params)
+    limiter.wait(urlsplit(url).netloc)
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, headers=headers, timeout=timeout)
+        result.latency = time.perf_counter() - start
+        result.status = response.status_code
+        history = getattr(getattr(response.raw, "retries", None), "history", ())
+        result.retries = len(history)
+        if response.ok:
+            try:
+                result.payload = response.json()
+            except ValueError:
+                result.payload = response.text
+        else:
+            result.error = f"{response.status_code} {response.reason}"
+    except requests.RequestException as e:
+        result.latency = time.perf_counter() - start
+        result.error = str(e)
+    return result
+
+
+def run_batch(jobs: list, method: str = "GET", headers: dict = None, concurrency: int = DEFAULT_CONCURRENCY,
+              rate_per_host: float = 0, retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+              timeout: float = DEFAULT_TIMEOUT, progress=None) -> list:
+    """Send ``(url, params)`` jobs concurrently on a pooled session; results come back in job order.
+
+    ``progress(done, total)`` is called from the calling thread as requests finish.
+    """
+    session = get_session(concurrency, retries, backoff)
+    limiter = HostRateLimiter(rate_per_host)
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_fetch, session, limiter, i, url, params, method, headers or {}, timeout)
+            for i, (url, params) in enumerate(jobs)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            results.append(future.result())
+            if progress is not None:
+                progress(done, len(futures))
+    return sorted(results, key=lambda r: r.index)
+
+
+def batch_frame(results: list) -> pd.DataFrame:
+    """Merge successful payloads into one frame.
+
+    Each row carries its request parameters as ``request.*`` and the time its request
+    took as ``elapsed_ms``.
+    """
+    records, owners = [], []
+    for r in results:
+        if r.error is not None:
+            continue
+        payload = r.payload if isinstance(r.payload, list) else [r.payload]
+        for item in payload:
+            records.append(item if isinstance(item, dict) else {"value": item})
+            owners.append(r.index)
+    if not records:
+        return pd.DataFrame()
+    frame = pd.json_normalize(records)
+    params = pd.DataFrame([results[i].params for i in owners]).add_prefix("request.")
+    params["elapsed_ms"] = [results[i].latency * 1000 for i in owners]
+    return pd.concat([params, frame], axis=1)
+
+
+def latency_stats(results: list, wall_time: float) -> dict:
+    latencies = pd.Series([r.latency for r in results], dtype=float) * 1000
+    failed = sum(r.error is not None for r in results)
+    return {
+        "requests": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "retries": sum(r.retries for r in results),
+        "p50_ms": latencies.quantile(0.5) if len(latencies) else 0.0,
+        "p95_ms": latencies.quantile(0.95) if len(latencies) else 0.0,
+        "max_ms": latencies.max() if len(latencies) else 0.0,
+        "throughput": len(results) / wall_time if wall_time else 0.0,
+    }
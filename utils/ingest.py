@@ -0,0 +1,448 @@
+"""File parsing for the Data Analysis uploader."""
+
+import codecs
+import hashlib
+import io
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cache import LRUCache
+from utils.dataset import content_hash, frame_nbytes
+from utils.dtypes import apply_column_plan, concat_chunks, infer_column_plan, optimize_dtypes
+
+# Upper bound on parsed frames kept in memory across reruns and sessions
+PARSE_CACHE_MAX_BYTES = 1024**3
+
+CSV_CHUNK_MB = 16
+CSV_SAMPLE_ROWS = 10_000
+JSON_READ_BYTES = 4 * 1024**2
+JSON_BATCH_ROWS = 50_000
+# How much of a failed chunk to show back to the user
+ERROR_PREVIEW_BYTES = 2000
+
+# File extension -> parse format
+UPLOAD_FORMATS = {
+    "csv": "csv",
+    "json": "json",
+    "ndjson": "json",
+    "jsonl": "json",
+    "parquet": "parquet",
+    "pq": "parquet",
+    "feather": "arrow",
+    "arrow": "arrow",
+    "ipc": "arrow",
+    "arrows": "arrow",
+}
+COLUMNAR_FORMATS = {"parquet", "arrow"}
+
+
+@dataclass
+class ChunkError:
+    """A CSV chunk with rows that failed to parse.
+
+    ``skipped`` counts the malformed rows dropped from an otherwise loaded chunk; it is
+    None when the chunk could not be parsed at all and was skipped whole.
+    """
+
+    index: int
+    first_row: int
+    message: str
+    preview: str
+    skipped: int | None = None
+
+
+@st.cache_resource
+def get_parse_cache() -> LRUCache:
+    """Process-wide cache of parsed uploads keyed by content hash and parse options."""
+    return LRUCache(PARSE_CACHE_MAX_BYTES)
+
+
+def options_key(options: dict) -> str:
+    """Stable string form of a parse options dict."""
+    return json.dumps(options, sort_keys=True, default=str)
+
+
+def _record_boundary(buf: bytes, last: bool = True) -> int:
+    """Offset just past the last (or first) newline in ``buf`` outside a quoted field, or -1.
+
+    ``buf`` must start at a record boundary so the running quote count tells whether
+    a newline is inside a quoted field. Escaped quotes (``""``) keep the parity intact.
+    """
+    if last:
+        quotes = buf.count(b'"')
+        end = len(buf)
+        while (nl := buf.rfind(b"\n", 0, end)) >= 0:
+            quotes -= buf.count(b'"', nl + 1, end)
+            if quotes % 2 == 0:
+                return nl + 1
+            end = nl
+        return -1
+
+    quotes = 0
+    start = 0
+    while (nl := buf.find(b"\n", start)) >= 0:
+        quotes += buf.count(b'"', start, nl)
+        if quotes % 2 == 0:
+            return nl + 1
+        start = nl + 1
+    return -1
+
+
+def _is_number(dtype) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _planned_dtypes(sample: pd.DataFrame) -> dict:
+    """Dtypes every chunk is read with: the sample's numbers and booleans, text for the rest."""
+    return {
+        col: sample[col].dtype if pd.api.types.is_numeric_dtype(sample[col].dtype) else str
+        for col in sample.columns
+    }
+
+
+def _read_chunk(data: bytes, dtypes: dict) -> tuple[pd.DataFrame, list]:
+    """Parse one chunk with ``dtypes``; returns the frame and the malformed lines it skipped."""
+    skipped = []
+    try:
+        return pd.read_csv(io.BytesIO(data), dtype=dtypes), skipped
+    except pd.errors.ParserError:
+        # The C parser stops at the first malformed line; the Python one can skip them
+        frame = pd.read_csv(io.BytesIO(data), dtype=dtypes, engine="python", on_bad_lines=skipped.append)
+        return frame, skipped
+
+
+def _retype(data: bytes, dtypes: dict) -> bool:
+    """Adjust ``dtypes`` in place to a chunk whose values don't fit them.
+
+    Numeric columns that only need a wider type (whole numbers with blanks, decimals
+    after integers) are widened. Any other disagreement makes the column text, as a
+    whole-file read would; returns True then, since earlier chunks must be read again.
+    """
+    loose, _ = _read_chunk(data, {col: dtype for col, dtype in dtypes.items() if dtype is str})
+    to_text = False
+    for col, planned in dtypes.items():
+        if planned is str or col not in loose.columns or loose[col].dtype == planned:
+            continue
+        if _is_number(planned) and _is_number(loose[col].dtype):
+            dtypes[col] = np.result_type(planned, loose[col].dtype)
+        else:
+            dtypes[col] = str
+            to_text = True
+    return to_text
+
+
+def read_csv_chunked(
+    file,
+    chunk_mb: int = CSV_CHUNK_MB,
+    sample_rows: int = CSV_SAMPLE_ROWS,
+    progress=None,
+) -> tuple[pd.DataFrame, list[ChunkError]]:
+    """Stream a CSV in line-aligned byte chunks, compacting dtypes as it goes.
+
+    Column dtypes are planned from the first ``sample_rows`` rows and every chunk is
+    read with them, so a column has one type throughout: numerics are downcast and
+    low-cardinality strings become categoricals chunk by chunk, and the full-width
+    frame never exists. A column whose later values don't fit its planned type is
+    widened, or read as text from the start. Malformed rows are skipped and chunks
+    that fail to parse entirely are dropped; both are reported as :class:`ChunkError`.
+    ``progress(rows, bytes_read, total_bytes)`` is called after every chunk.
+    """
+    dtypes = {}
+    while True:
+        result = _read_csv_pass(file, chunk_mb * 1024**2, sample_rows, dtypes, progress)
+        if result is not None:
+            return result
+
+
+def _read_csv_pass(file, chunk_bytes: int, sample_rows: int, dtypes: dict, progress):
+    """One pass of :func:`read_csv_chunked`; None when a column turned to text and the file must be re-read."""
+    total_bytes = getattr(file, "size", None)
+    file.seek(0)
+
+    chunks = []
+    errors = []
+    header = None
+    plan = {}
+    pending = b""
+    rows = 0
+    bytes_read = 0
+    index = 0
+
+    while True:
+        data = file.read(chunk_bytes)
+        bytes_read += len(data)
+        buf = pending + data
+        if data:
+            cut = _record_boundary(buf)
+            if cut <= 0:
+                # No complete record yet (e.g. a very long quoted field); keep reading
+                pending = buf
+                continue
+        else:
+            cut = len(buf)
+        block, pending = buf[:cut], buf[cut:]
+
+        if header is None:
+            header_end = _record_boundary(block, last=False)
+            if header_end < 0:
+                header_end = len(block)
+            header, block = block[:header_end], block[header_end:]
+            if not header.endswith(b"\n"):
+                header += b"\n"
+            sample = pd.read_csv(io.BytesIO(header + block), nrows=sample_rows, dtype=dtypes or None,
+                                 on_bad_lines="skip")
+            plan = infer_column_plan(sample)
+            if not dtypes:
+                dtypes.update(_planned_dtypes(sample))
+
+        if block.strip():
+            try:
+                try:
+                    chunk, skipped = _read_chunk(header + block, dtypes)
+                except (ValueError, TypeError, OverflowError) as e:
+                    if isinstance(e, pd.errors.ParserError):
+                        raise
+                    # A value that doesn't fit its planned dtype
+                    if _retype(header + block, dtypes):
+                        return None
+                    chunk, skipped = _read_chunk(header + block, dtypes)
+            except Exception as e:
+                errors.append(ChunkError(
+                    index=index,
+                    first_row=rows,
+                    message=str(e),
+                    preview=block[:ERROR_PREVIEW_BYTES].decode("utf-8", errors="replace"),
+                ))
+            else:
+                if skipped:
+                    errors.append(ChunkError(
+                        index=index,
+                        first_row=rows,
+                        message=f"{len(skipped)} malformed row(s) skipped",
+                        preview="\n".join(",".join(line) for line in skipped)[:ERROR_PREVIEW_BYTES],
+                        skipped=len(skipped),
+                    ))
+                chunks.append(apply_column_plan(chunk, plan))
+                rows += len(chunk)
+            index += 1
+            if progress is not None:
+                progress(rows, bytes_read, total_bytes)
+
+        if not data:
+            break
+
+    if header is None:
+        raise ValueError("The file is empty.")
+    if not chunks:
+        if errors:
+            # Nothing parsed: keep the original error visible instead of an empty frame
+            raise ValueError(errors[0].message)
+        # Header only: an empty frame that still has the columns
+        return apply_column_plan(pd.read_csv(io.BytesIO(header)), plan), errors
+    return concat_chunks(chunks), errors
+
+
+def iter_json_records(file, read_bytes: int = JSON_READ_BYTES, progress=None):
+    """Yield records one at a time from a JSON array, a single object or NDJSON.
+
+    Only the current window of text and the record being decoded are held in
+    memory. Top-level arrays are walked element by element; anything else is read
+    as a sequence of whitespace-separated values, which covers both NDJSON and a
+    single object. ``progress(bytes_read)`` is called after every read.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    file.seek(0)
+    buf = ""
+    pos = 0
+    bytes_read = 0
+    eof = False
+    in_array = None
+
+    def fill() -> bool:
+        nonlocal buf, pos, bytes_read, eof
+        data = file.read(read_bytes)
+        bytes_read += len(data)
+        eof = not data
+        # Drop consumed text so the window never grows past the unread tail
+        buf = buf[pos:] + text.decode(data, final=eof)
+        pos = 0
+        if progress is not None:
+            progress(bytes_read)
+        return not eof
+
+    while True:
+        while pos < len(buf) and (buf[pos].isspace() or (in_array and buf[pos] == ",")):
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                if in_array is None:
+                    raise ValueError("The file is empty.")
+                if in_array:
+                    raise ValueError("Unexpected end of file inside the top-level JSON array.")
+                return
+            fill()
+            continue
+
+        if in_array is None:
+            in_array = buf[pos] == "["
+            if in_array:
+                pos += 1
+            continue
+        if in_array and buf[pos] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Invalid JSON near offset {bytes_read - len(buf) + e.pos}: {e.msg}") from None
+            fill()
+            continue
+        if end >= len(buf) and not eof:
+            # A value ending exactly at the window edge may be a truncated number
+            fill()
+            continue
+        pos = end
+        yield value if isinstance(value, dict) else {"value": value}
+
+
+def read_json_streaming(file, batch_rows: int = JSON_BATCH_ROWS, progress=None) -> pd.DataFrame:
+    """Load JSON or NDJSON records in columnar batches, flattening nested objects.
+
+    Records are normalized ``batch_rows`` at a time, so at most one batch of Python
+    objects exists alongside the growing list of compact DataFrame batches.
+    ``progress(rows, bytes_read, total_bytes)`` is called after every read.
+    """
+    total_bytes = getattr(file, "size", None)
+    batches = []
+    batch = []
+    rows = 0
+    plan = None
+
+    def flush():
+        nonlocal batch, plan
+        frame = pd.json_normalize(batch)
+        batch = []
+        if plan is None:
+            plan = infer_column_plan(frame)
+        batches.append(apply_column_plan(frame, plan))
+
+    def report(bytes_read):
+        if progress is not None:
+            progress(rows + len(batch), bytes_read, total_bytes)
+
+    for record in iter_json_records(file, progress=report):
+        batch.append(record)
+        if len(batch) >= batch_rows:
+            rows += len(batch)
+            flush()
+    if batch:
+        flush()
+
+    if not batches:
+        # An empty top-level array
+        return pd.DataFrame()
+    return concat_chunks(batches)
+
+
+def upload_format(filename: str) -> str | None:
+    """Parse format for an uploaded file name, or None if unsupported."""
+    return UPLOAD_FORMATS.get(filename.rsplit(".", 1)[-1].lower())
+
+
+def _arrow_source(uploaded_file):
+    """Zero-copy Arrow view over the uploaded bytes, which Streamlit keeps in memory."""
+    import pyarrow as pa
+
+    return pa.BufferReader(pa.py_buffer(uploaded_file.getbuffer()))
+
+
+def _open_ipc(uploaded_file):
+    """Open an Arrow IPC file (Feather v2) or stream as a record batch reader."""
+    import pyarrow as pa
+
+    try:
+        return pa.ipc.open_file(_arrow_source(uploaded_file))
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(_arrow_source(uploaded_file))
+
+
+def columnar_schema(uploaded_file, fmt: str) -> list[str]:
+    """Column names of a Parquet or Arrow file, read from its metadata only."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        names = pq.read_schema(_arrow_source(uploaded_file)).names
+    else:
+        names = _open_ipc(uploaded_file).schema.names
+    # Skip the serialized pandas index; it is restored from metadata when present
+    return [n for n in names if not n.startswith("__index_level_")]
+
+
+def read_columnar(uploaded_file, fmt: str, columns: list | None = None) -> pd.DataFrame:
+    """Load a Parquet or Arrow IPC upload straight into pandas, reading only ``columns``.
+
+    Arrow IPC buffers are referenced in place rather than decoded, and the table is
+    converted with ``split_blocks``/``self_destruct`` so numeric columns can be
+    handed to pandas without an extra copy.
+    """
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(_arrow_source(uploaded_file), columns=columns)
+    else:
+        reader = _open_ipc(uploaded_file)
+        table = reader.read_all()
+        if columns is not None:
+            table = table.select(columns)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def parse_upload(uploaded_file, options: dict, progress=None) -> tuple[pd.DataFrame, list[ChunkError]]:
+    """Parse an uploaded file into a DataFrame according to ``options``."""
+    if options["format"] in COLUMNAR_FORMATS:
+        return read_columnar(uploaded_file, options["format"], options.get("columns")), []
+
+    if options["format"] == "csv":
+        return read_csv_chunked(
+            uploaded_file,
+            chunk_mb=options.get("chunk_mb", CSV_CHUNK_MB),
+            sample_rows=options.get("sample_rows", CSV_SAMPLE_ROWS),
+            progress=progress,
+        )
+
+    return read_json_streaming(
+        uploaded_file,
+        batch_rows=options.get("batch_rows", JSON_BATCH_ROWS),
+        progress=progress,
+    ), []
+
+
+def load_upload(uploaded_file, options: dict, progress=None):
+    """Return ``(df, version, cache_hit, meta)`` for an upload, parsing only on a cache miss.
+
+    The version token is derived from the file content and the parse options, so
+    identical uploads map to the same cache entry regardless of file name. ``meta``
+    holds the skipped chunk ``errors`` and, when ``options["optimize"]`` is set, the
+    ``optimize_report`` of the one-off dtype optimization pass.
+    """
+    cache = get_parse_cache()
+    version = hashlib.blake2b(
+        f"{content_hash(uploaded_file)}|{options_key(options)}".encode(), digest_size=16
+    ).hexdigest()
+    cached = cache.get(version)
+    if cached is not None:
+        df, meta = cached
+        return df, version, True, meta
+
+    df, errors = parse_upload(uploaded_file, options, progress)
+    meta = {"errors": errors, "optimize_report": None}
+    if options.get("optimize"):
+        df, meta["optimize_report"] = optimize_dtypes(df)
+    cache.put(version, (df, meta), frame_nbytes(df))
+    return df, version, False, meta
@@ -0,0 +1,126 @@
+"""LLM clients, request shaping and usage accounting shared by the chatbot's providers."""
+
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from utils.preferences import get_preference
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 2
+SECRET_NAMES = {"OpenAI": "OPENAI_API_KEY", "Anthropic": "ANTHROPIC_API_KEY"}
+
+
+@st.cache_resource(show_spinner=False)
+def _client_registry() -> dict:
+    """Process-wide clients, shared by every session so HTTP connections stay alive across reruns."""
+    return {"lock": threading.Lock(), "clients": {}}
+
+
+def _make_client(provider: str, api_key: str, timeout: float, max_retries: int):
+    # The SDKs retry with exponential backoff on connection errors, 408/409/429 and 5xx
+    if provider == "OpenAI":
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, timeout=timeout, max_retries=max_retries)
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key, timeout=timeout, max_retries=max_retries)
+
+
+def get_client(provider: str, api_key: str, timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES):
+    """Shared client for ``provider`` and ``api_key``, built on first use with the given policy."""
+    key = (provider, api_key, float(timeout), int(max_retries))
+    registry = _client_registry()
+    with registry["lock"]:
+        entry = registry["clients"].get(key)
+        if entry is None:
+            entry = {"client": _make_client(*key), "created": time.time(), "requests": 0}
+            registry["clients"][key] = entry
+        entry["requests"] += 1
+    return entry["client"]
+
+
+def client_for(provider: str):
+    """Client for ``provider`` using the key from secrets and the timeout/retry preferences."""
+    return get_client(
+        provider,
+        st.secrets.get(SECRET_NAMES[provider], ""),
+        get_preference("llm_timeout", DEFAULT_TIMEOUT),
+        get_preference("llm_max_retries", DEFAULT_MAX_RETRIES),
+    )
+
+
+def _connections(client) -> tuple:
+    """(open, idle) HTTP connections in the client's pool, or (None, None) if not exposed."""
+    pool = getattr(getattr(getattr(client, "_client", None), "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None, None
+    return len(connections), sum(1 for c in connections if c.is_idle())
+
+
+def pool_stats() -> pd.DataFrame:
+    """One row per pooled client; API keys are shown by their last four characters only."""
+    registry = _client_registry()
+    with registry["lock"]:
+        entries = list(registry["clients"].items())
+    rows = []
+    for (provider, api_key, timeout, max_retries), entry in entries:
+        open_conns, idle_conns = _connections(entry["client"])
+        rows.append({
+            "Provider": provider,
+            "Key": f"...{api_key[-4:]}" if api_key else "(none)",
+            "Timeout (s)": timeout,
+            "Retries": max_retries,
+            "Requests": entry["requests"],
+            "Open connections": open_conns,
+            "Idle connections": idle_conns,
+            "Age (s)": round(time.time() - entry["created"]),
+        })
+    return pd.DataFrame(rows)
+
+
+def anthropic_system(text: str, cache: bool = True) -> list:
+    """System prompt as a content block, marked as a cache breakpoint so turns reuse the prefix."""
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+def openai_usage(usage) -> dict:
+    """Normalize an OpenAI ``usage`` object; ``prompt_tokens`` already includes cached tokens."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "input_tokens": usage.prompt_tokens or 0,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+        "cache_write_tokens": 0,
+        "output_tokens": usage.completion_tokens or 0,
+    }
+
+
+def anthropic_usage(usage) -> dict:
+    """Normalize an Anthropic ``usage`` object, whose ``input_tokens`` excludes cache reads and writes."""
+    cached = getattr(usage, "cache_read_input_tokens", None) or 0
+    written = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return {
+        "input_tokens": (usage.input_tokens or 0) + cached + written,
+        "cached_tokens": cached,
+        "cache_write_tokens": written,
+        "output_tokens": usage.output_tokens or 0,
+    }
+
+
+def add_usage(total: dict, usage: dict) -> None:
+    """Accumulate one request's usage into ``total`` for multi-request answers such as tool loops."""
+    for name, count in usage.items():
+        total[name] = total.get(name, 0) + count
+
+
+def record_usage(usage: dict) -> None:
+    """Keep the last response's token usage and running session totals."""
+    totals = st.session_state.setdefault("chat_usage", {"last": None, "input_tokens": 0, "cached_tokens": 0})
+    totals["last"] = usage
+    totals["input_tokens"] += usage["input_tokens"]
+    totals["cached_tokens"] += usage["cached_tokens"]
@@ -0,0 +1,199 @@
+"""Paginated fetching for the REST and GraphQL clients, streamed into a columnar buffer."""
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+from utils.http_client import DEFAULT_TIMEOUT, get_session
+
+PAGINATION_SCHEMES = ["None", "Link header", "Offset/limit"]
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_MAX_ROWS = 100_000
+DEFAULT_MAX_MB = 100
+MAX_PAGES = 10_000
+
+
+class ColumnBuffer:
+    """Table that grows one page at a time, stored as per-column chunks.
+
+    Pages are flattened and appended as they arrive, so the raw JSON of earlier pages
+    never has to be kept around. Columns that first appear on a later page are
+    back-filled with missing values when the frame is built.
+    """
+
+    def __init__(self):
+        self._chunks = {}
+        self.rows = 0
+        self.nbytes = 0
+
+    def append(self, records: list):
+        if not records:
+            return
+        page = pd.json_normalize([r if isinstance(r, dict) else {"value": r} for r in records])
+        page.index = pd.RangeIndex(self.rows, self.rows + len(page))
+        for col in page.columns:
+            self._chunks.setdefault(col, []).append(page[col])
+        self.rows += len(page)
+        self.nbytes += int(page.memory_usage(deep=True).sum())
+
+    def to_frame(self) -> pd.DataFrame:
+        index = pd.RangeIndex(self.rows)
+        return pd.DataFrame({
+            col: (pd.concat(chunks) if len(chunks) > 1 else chunks[0]).reindex(index)
+            for col, chunks in self._chunks.items()
+        }, index=index)
+
+
+def resolve_path(payload, path: str):
+    """Follow a dotted path such as ``data.items`` into parsed JSON; an empty path returns the payload."""
+    for key in filter(None, path.split(".")):
+        if isinstance(payload, list):
+            payload = payload[int(key)]
+        else:
+            payload = payload[key]
+    return payload
+
+
+def extract_records(payload, path: str = "") -> list:
+    """Records of one page: the list at ``path``, or the first list found in a top-level object."""
+    found = resolve_path(payload, path)
+    if isinstance(found, list):
+        return found
+    if isinstance(found, dict):
+        if not path:
+            for value in found.values():
+                if isinstance(value, list):
+                    return value
+        return [found]
+    return [{"value": found}]
+
+
+def connection_records(connection: dict) -> list:
+    """Nodes of a GraphQL connection, from ``nodes`` or ``edges[].node``."""
+    if connection.get("nodes") is not None:
+        if not isinstance(connection["nodes"], list):
+            raise ValueError("'nodes' is not a list")
+        return connection["nodes"]
+    edges = connection.get("edges") or []
+    if not isinstance(edges, list):
+        raise ValueError("'edges' is not a list")
+    return [edge["node"] for edge in edges if isinstance(edge, dict) and edge.get("node") is not None]
+
+
+def _lookup(payload, path: str, what: str):
+    try:
+        return resolve_path(payload, path)
+    except (KeyError, IndexError, ValueError, TypeError):
+        raise ValueError(f"no {what} at '{path}'") from None
+
+
+def _send(session, request: dict):
+    response = session.request(timeout=DEFAULT_TIMEOUT, **request)
+    response.raise_for_status()
+    return response
+
+
+def _next_rest(scheme: str, request: dict, response, records: list, options: dict):
+    if scheme == "Link header":
+        url = response.links.get("next", {}).get("url")
+        return {**request, "url": url, "params": None} if url else None
+    # Offset/limit: a short page means there is nothing after it
+    if len(records) < options["page_size"]:
+        return None
+    params = dict(request.get("params") or {})
+    params[options["offset_param"]] = int(params.get(options["offset_param"], 0)) + len(records)
+    return {**request, "params": params}
+
+
+def _next_graphql(request: dict, connection: dict, options: dict):
+    page_info = connection.get("pageInfo")
+    if not isinstance(page_info, dict) or not page_info.get("hasNextPage") or not page_info.get("endCursor"):
+        return None
+    nxt = copy.deepcopy(request)
+    nxt["json"].setdefault("variables", {})[options["cursor_variable"]] = page_info["endCursor"]
+    return nxt
+
+
+def _read_page(scheme: str, request: dict, response, payload, options: dict) -> tuple:
+    """``(records, next_request)`` of one page; ValueError when the page doesn't have the expected shape."""
+    if scheme == "GraphQL cursor":
+        if not isinstance(payload, dict):
+            raise ValueError("the response is not a JSON object")
+        if payload.get("errors"):
+            error = payload["errors"][0]
+            raise ValueError(f"GraphQL error: {error.get('message', error) if isinstance(error, dict) else error}")
+        connection = _lookup(payload, options["connection_path"], "connection")
+        if not isinstance(connection, dict):
+            raise ValueError(f"no connection object at '{options['connection_path']}'")
+        return connection_records(connection), _next_graphql(request, connection, options)
+    try:
+        records = extract_records(payload, options.get("records_path", ""))
+    except (KeyError, IndexError, ValueError, TypeError):
+        raise ValueError(f"no records at '{options.get('records_path', '')}'") from None
+    nxt = _next_rest(scheme, request, response, records, options) if scheme != "None" else None
+    return records, nxt
+
+
+def paginate(request: dict, scheme: str, options: dict, max_rows: int = DEFAULT_MAX_ROWS,
+             max_bytes: int = DEFAULT_MAX_MB * 1024**2, progress=None) -> tuple:
+    """Fetch pages until the last one or a row/byte cap; returns ``(frame, info)``.
+
+    ``request`` holds ``requests`` keyword arguments (method, url, headers, params, json).
+    ``scheme`` is one of ``PAGINATION_SCHEMES`` or ``"GraphQL cursor"``. While a page is
+    being flattened into the buffer, the next one is already downloading. A first page
+    of the wrong shape raises ValueError and a failed first request raises its
+    ``RequestException``; a later bad or failed page ends pagination with the rows so
+    far and ``info["error"]`` set.
+    """
+    session = get_session()
+    request = copy.deepcopy(request)
+    if scheme == "Offset/limit":
+        params = request.setdefault("params", {}) or {}
+        params[options["limit_param"]] = options["page_size"]
+        params.setdefault(options["offset_param"], 0)
+        request["params"] = params
+
+    buffer = ColumnBuffer()
+    info = {"pages": 0, "bytes": 0, "stopped": "last page", "error": False}
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        pending = prefetcher.submit(_send, session, request)
+        while pending is not None:
+            try:
+                response = pending.result()
+            except requests.RequestException as e:
+                if not info["pages"]:
+                    raise
+                # An HTTP error or timeout after page 1 ends pagination like a bad page does
+                info["stopped"], info["error"] = f"page {info['pages'] + 1}: {e}", True
+                break
+            info["pages"] += 1
+            info["bytes"] += len(response.content)
+            try:
+                records, nxt = _read_page(scheme, request, response, response.json(), options)
+            except ValueError as e:
+                if info["pages"] == 1:
+                    raise ValueError(f"Pagination stopped on page 1: {e}") from None
+                # Keep what the earlier pages returned
+                info["stopped"], info["error"] = f"page {info['pages']}: {e}", True
+                break
+
+            if buffer.rows + len(records) >= max_rows:
+                records = records[:max_rows - buffer.rows]
+                info["stopped"], nxt = "row cap", None
+            elif info["bytes"] >= max_bytes:
+                info["stopped"], nxt = "byte cap", None
+            elif nxt is not None and info["pages"] >= MAX_PAGES:
+                info["stopped"], nxt = "page cap", None
+
+            # Start downloading the next page before flattening this one
+            pending = prefetcher.submit(_send, session, nxt) if nxt is not None else None
+            if nxt is not None:
+                request = nxt
+            buffer.append(records)
+            if progress is not None:
+                progress(info["pages"], buffer.rows, info["bytes"])
+
+    info["rows"] = buffer.rows
+    return buffer.to_frame(), info
@@ -0,0 +1,138 @@
+"""Response bodies for API Tools: spooled to disk when large, parsed once, previewed in bounded form."""
+
+import json
+import mmap
+import os
+import tempfile
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils.pagination import extract_records
+
+try:
+    import orjson
+except ImportError:  # in requirements.txt; fall back to the standard library parser if missing
+    orjson = None
+
+SPILL_BYTES = 8 * 1024**2
+DOWNLOAD_CHUNK_BYTES = 1024**2
+TREE_MAX_ITEMS = 50
+TREE_MAX_DEPTH = 8
+TREE_MAX_STRING = 500
+TEXT_PREVIEW_BYTES = 100_000
+
+
+@dataclass
+class Payload:
+    """A response body held in memory (``data``) or, past ``SPILL_BYTES``, in a temp or cache file (``path``)."""
+
+    size: int
+    data: bytes | None = None
+    path: str | None = None
+    owned: bool = False
+
+    def read(self):
+        """Whole body as a bytes-like object; large files are memory-mapped rather than copied."""
+        if self.data is not None:
+            return self.data
+        if self.size == 0:
+            return b""
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def preview(self, limit: int = TEXT_PREVIEW_BYTES) -> str:
+        if self.data is not None:
+            head = self.data[:limit]
+        else:
+            with open(self.path, "rb") as f:
+                head = f.read(limit)
+        return head.decode("utf-8", errors="replace")
+
+    def discard(self):
+        if self.owned and self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def download(response, spill_bytes: int = SPILL_BYTES) -> Payload:
+    """Read a streamed ``requests`` response, switching to a temp file once it passes ``spill_bytes``."""
+    buffer, size, handle = bytearray(), 0, None
+    try:
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if handle is None and size > spill_bytes:
+                handle = tempfile.NamedTemporaryFile(prefix="api_body_", suffix=".json", delete=False)
+                handle.write(buffer)
+                buffer = None
+            if handle is None:
+                buffer += chunk
+            else:
+                handle.write(chunk)
+    finally:
+        if handle is not None:
+            handle.close()
+    if handle is None:
+        return Payload(size, data=bytes(buffer))
+    return Payload(size, path=handle.name, owned=True)
+
+
+def file_payload(path: str, spill_bytes: int = SPILL_BYTES) -> Payload:
+    """Payload for a body already on disk; small files are read into memory."""
+    size = os.path.getsize(path)
+    if size <= spill_bytes:
+        with open(path, "rb") as f:
+            return Payload(size, data=f.read())
+    return Payload(size, path=path)
+
+
+def parse_json(payload: Payload):
+    """Decode the body once, with orjson when it is installed."""
+    body = payload.read()
+    try:
+        if orjson is not None:
+            return orjson.loads(memoryview(body) if isinstance(body, mmap.mmap) else body)
+        return json.loads(body[:] if isinstance(body, mmap.mmap) else body)
+    finally:
+        if isinstance(body, mmap.mmap):
+            body.close()
+
+
+def truncate_tree(node, max_items: int = TREE_MAX_ITEMS, max_depth: int = TREE_MAX_DEPTH,
+                  max_string: int = TREE_MAX_STRING, depth: int = 0):
+    """Bounded copy of parsed JSON for the tree viewer; returns ``(tree, truncated)``."""
+    if isinstance(node, dict):
+        if depth >= max_depth:
+            return f"{{… {len(node)} keys}}", True
+        items = list(node.items())
+        tree, truncated = {}, len(items) > max_items
+        for key, value in items[:max_items]:
+            tree[key], cut = truncate_tree(value, max_items, max_depth, max_string, depth + 1)
+            truncated |= cut
+        if len(items) > max_items:
+            tree["…"] = f"{len(items) - max_items} more keys"
+        return tree, truncated
+    if isinstance(node, list):
+        if depth >= max_depth:
+            return f"[… {len(node)} items]", True
+        tree, truncated = [], len(node) > max_items
+        for value in node[:max_items]:
+            child, cut = truncate_tree(value, max_items, max_depth, max_string, depth + 1)
+            tree.append(child)
+            truncated |= cut
+        if len(node) > max_items:
+            tree.append(f"… {len(node) - max_items} more items")
+        return tree, truncated
+    if isinstance(node, str) and len(node) > max_string:
+        return node[:max_string] + f"… ({len(node)} chars)", True
+    return node, False
+
+
+def records_frame(parsed, records_path: str = "") -> pd.DataFrame:
+    """Flatten the records in a parsed response into columns (``parent.child``)."""
+    records = extract_records(parsed, records_path)
+    if records and not all(isinstance(r, dict) for r in records):
+        records = [r if isinstance(r, dict) else {"value": r} for r in records]
+    return pd.json_normalize(records)
@@ -0,0 +1,196 @@
+"""Background polling for API Tools, appending new records into a fixed-size columnar ring buffer."""
+
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+import requests
+
+from utils.http_client import DEFAULT_TIMEOUT
+from utils.payload import records_frame
+
+DEFAULT_INTERVAL = 5
+MIN_INTERVAL = 1
+DEFAULT_CAPACITY = 10_000
+MAX_CAPACITY = 1_000_000
+POLLED_AT = "_polled_at"
+
+
+def _empty_column(sample: pd.Series, size: int) -> np.ndarray:
+    """Storage for a column: float for numbers, datetime64 for timestamps, object for the rest."""
+    if pd.api.types.is_numeric_dtype(sample) and not pd.api.types.is_bool_dtype(sample):
+        return np.full(size, np.nan)
+    if pd.api.types.is_datetime64_any_dtype(sample) and getattr(sample.dt, "tz", None) is None:
+        return np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+    return np.full(size, None, dtype=object)
+
+
+def _fits(column: np.ndarray, values: pd.Series) -> bool:
+    if column.dtype == object:
+        return True
+    if column.dtype.kind == "f":
+        return pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+    return pd.api.types.is_datetime64_any_dtype(values) and getattr(values.dt, "tz", None) is None
+
+
+def _missing(column: np.ndarray):
+    if column.dtype.kind == "f":
+        return np.nan
+    if column.dtype.kind == "M":
+        return np.datetime64("NaT")
+    return None
+
+
+class RingBuffer:
+    """The last ``capacity`` rows of a polled feed, one numpy array per column.
+
+    Every row is written twice, at slot ``i`` and ``i + capacity`` of arrays twice the
+    capacity, so the newest ``n`` rows are always one contiguous slice. ``window`` hands
+    out those slices as views; nothing is copied when the Dashboard redraws. With a key
+    column, rows whose key is already held are dropped, and keys are forgotten again
+    when their rows are overwritten.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, key: str = None):
+        self.capacity = capacity
+        self.key = key
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.total = 0
+        self._columns = {}
+        self._keys = set()
+
+    # The poller thread adds and retypes columns, so readers take the lock and get a copy
+    @property
+    def columns(self) -> list:
+        with self.lock:
+            return list(self._columns)
+
+    def numeric_columns(self) -> list:
+        with self.lock:
+            return [name for name, column in self._columns.items() if column.dtype.kind == "f"]
+
+    def _end(self) -> int:
+        """Index just past the newest row in the doubled arrays."""
+        return self.total % self.capacity + self.capacity
+
+    def append(self, frame: pd.DataFrame) -> tuple:
+        """Add the rows of ``frame`` not seen before; returns ``(added, duplicates)``."""
+        duplicates = 0
+        if self.key is not None and not frame.empty:
+            if self.key not in frame.columns:
+                raise ValueError(f"Key column '{self.key}' is not in the response")
+            before = len(frame)
+            frame = frame[frame[self.key].notna() & ~frame[self.key].isin(self._keys)]
+            frame = frame.drop_duplicates(self.key, keep="last")
+            duplicates = before - len(frame)
+        frame = frame.iloc[-self.capacity:]
+        count = len(frame)
+        if not count:
+            return 0, duplicates
+
+        with self.lock:
+            for name in frame.columns:
+                if name not in self._columns:
+                    self._columns[name] = _empty_column(frame[name], 2 * self.capacity)
+                elif not _fits(self._columns[name], frame[name]):
+                    self._columns[name] = self._columns[name].astype(object)
+
+            evicted = max(self.rows + count - self.capacity, 0)
+            if self.key is not None and evicted:
+                end = self._end()
+                oldest = self._columns[self.key][end - self.rows:end - self.rows + evicted]
+                self._keys.difference_update(oldest.tolist())
+
+            slots = (self.total + np.arange(count)) % self.capacity
+            for name, column in self._columns.items():
+                if name in frame.columns:
+                    values = frame[name].to_numpy(dtype=column.dtype, na_value=_missing(column))
+                else:
+                    values = _missing(column)
+                column[slots] = values
+                column[slots + self.capacity] = values
+
+            if self.key is not None:
+                self._keys.update(frame[self.key].tolist())
+            self.total += count
+            self.rows = min(self.rows + count, self.capacity)
+        return count, duplicates
+
+    def window(self, columns: list = None, last: int = None) -> dict:
+        """Views of the newest ``last`` rows, oldest first; hold ``lock`` while using them."""
+        n = self.rows if last is None else min(last, self.rows)
+        end = self._end()
+        return {name: self._columns[name][end - n:end] for name in (columns or self._columns)}
+
+    def to_frame(self, last: int = None) -> pd.DataFrame:
+        """Copy of the buffered rows as a DataFrame."""
+        with self.lock:
+            return pd.DataFrame({name: view.copy() for name, view in self.window(last=last).items()})
+
+    def nbytes(self) -> int:
+        with self.lock:
+            return sum(column.nbytes for column in self._columns.values())
+
+
+def _poll_loop(poller_ref, stop: threading.Event):
+    # Holds the poller only weakly, so the thread ends once its session is gone
+    while not stop.is_set():
+        poller = poller_ref()
+        if poller is None:
+            return
+        started = time.monotonic()
+        poller.poll_once()
+        wait = poller.interval - (time.monotonic() - started)
+        del poller
+        stop.wait(max(wait, 0))
+
+
+class Poller:
+    """Fetches one endpoint every ``interval`` seconds on a background thread into a ``RingBuffer``.
+
+    ``request`` holds ``requests`` keyword arguments (method, url, headers). Failed polls
+    are counted and the last error kept; polling carries on at the next tick.
+    """
+
+    def __init__(self, session: requests.Session, request: dict, interval: float = DEFAULT_INTERVAL,
+                 records_path: str = "", key: str = None, capacity: int = DEFAULT_CAPACITY):
+        self.session = session
+        self.request = request
+        self.interval = max(float(interval), MIN_INTERVAL)
+        self.records_path = records_path
+        self.buffer = RingBuffer(capacity, key or None)
+        self.stats = {"polls": 0, "added": 0, "duplicates": 0, "errors": 0, "last_poll": None, "last_error": None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=_poll_loop, args=(weakref.ref(self), self._stop),
+                                        name="api-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll_once(self):
+        polled_at = pd.Timestamp.now()
+        try:
+            response = self.session.request(timeout=DEFAULT_TIMEOUT, **self.request)
+            response.raise_for_status()
+            frame = records_frame(response.json(), self.records_path)
+            frame[POLLED_AT] = polled_at
+            added, duplicates = self.buffer.append(frame)
+            self.stats["added"] += added
+            self.stats["duplicates"] += duplicates
+            self.stats["last_error"] = None
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(e)
+        self.stats["polls"] += 1
+        self.stats["last_poll"] = polled_at
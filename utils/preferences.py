@@ -0,0 +1,8 @@
+"""Access to the preferences saved on the Settings page."""
+
+import streamlit as st
+
+
+def get_preference(name: str, default):
+    """Return a saved preference, or ``default`` if the Settings form was never submitted."""
+    return st.session_state.get("preferences", {}).get(name, default)
@@ -0,0 +1,110 @@
+"""Per-column statistics shared by the Statistics tab, Dashboard and chatbot."""
+
+import pandas as pd
+import streamlit as st
+
+from utils.dataset import dataset_version
+from utils.dtypes import nunique
+
+TOP_VALUES = 10
+DESCRIBE_ROWS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+PROFILE_COLUMNS = ["dtype", "count", "nulls", "unique", *DESCRIBE_ROWS[1:]]
+
+
+def is_numeric(series: pd.Series) -> bool:
+    """Numeric in the describe() sense: any int/float width, nullable included, bools excluded."""
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def _store() -> dict:
+    """Profile cache for the current dataset version, carrying over unchanged columns."""
+    version = dataset_version()
+    store = st.session_state.get("column_profiles")
+    if store is not None and store["version"] == version:
+        return store
+
+    fresh = {"version": version, "stats": {}, "top": {}}
+    lineage = st.session_state.get("df_lineage") or {}
+    if store is not None and lineage.get("version") == version and lineage.get("parent") == store["version"]:
+        columns = set(st.session_state.df.columns) - lineage["changed"]
+        fresh["stats"] = {c: v for c, v in store["stats"].items() if c in columns}
+        fresh["top"] = {c: v for c, v in store["top"].items() if c in columns}
+    st.session_state.column_profiles = fresh
+    return fresh
+
+
+def _compute(df: pd.DataFrame, columns: list) -> dict:
+    """Compute stats for ``columns`` in one vectorized pass per statistic."""
+    sub = df[columns]
+    nulls = sub.isna().sum()
+    try:
+        unique = sub.nunique()
+    except TypeError:
+        # Columns holding lists or dicts can't be hashed in the vectorized pass
+        unique = pd.Series({c: nunique(sub[c]) for c in columns})
+    numeric = [c for c in columns if is_numeric(sub[c])]
+    dated = [c for c in columns if pd.api.types.is_datetime64_any_dtype(sub[c].dtype)]
+
+    extra = pd.DataFrame(index=columns, columns=DESCRIBE_ROWS[1:], dtype=object)
+    if numeric:
+        values = sub[numeric]
+        quartiles = values.quantile([0.25, 0.5, 0.75])
+        extra.loc[numeric, "mean"] = values.mean()
+        extra.loc[numeric, "std"] = values.std()
+        extra.loc[numeric, "min"] = values.min()
+        extra.loc[numeric, "25%"] = quartiles.loc[0.25]
+        extra.loc[numeric, "50%"] = quartiles.loc[0.5]
+        extra.loc[numeric, "75%"] = quartiles.loc[0.75]
+        extra.loc[numeric, "max"] = values.max()
+    if dated:
+        extra.loc[dated, "min"] = sub[dated].min()
+        extra.loc[dated, "max"] = sub[dated].max()
+
+    return {
+        col: {
+            "dtype": str(sub[col].dtype),
+            "count": len(sub) - int(nulls[col]),
+            "nulls": int(nulls[col]),
+            "unique": int(unique[col]),
+            **extra.loc[col].to_dict(),
+        }
+        for col in columns
+    }
+
+
+def column_profile(columns=None) -> pd.DataFrame:
+    """Stats for the session dataset, one row per column, computed once per column and version."""
+    df = st.session_state.df
+    store = _store()
+    columns = list(df.columns if columns is None else columns)
+    missing = [c for c in columns if c not in store["stats"]]
+    if missing:
+        store["stats"].update(_compute(df, missing))
+    return pd.DataFrame.from_dict(
+        {c: store["stats"][c] for c in columns}, orient="index", columns=PROFILE_COLUMNS
+    )
+
+
+def describe_numeric(columns=None) -> pd.DataFrame:
+    """Equivalent of ``df[numeric_cols].describe()`` served from the column profile."""
+    profile = column_profile(columns)
+    numeric = [c for c in profile.index if is_numeric(st.session_state.df[c])]
+    table = profile.loc[numeric, DESCRIBE_ROWS].astype(float).T
+    table.columns.name = None
+    return table
+
+
+def top_values(column, n: int = TOP_VALUES) -> pd.Series:
+    """Most frequent values of a column, cached per version."""
+    store = _store()
+    cached = store["top"].get(column)
+    if cached is None or cached[0] < n:
+        limit = max(n, TOP_VALUES)
+        series = st.session_state.df[column]
+        try:
+            counts = series.value_counts()
+        except TypeError:
+            counts = series.dropna().astype(str).value_counts()
+        cached = (limit, counts.head(limit))
+        store["top"][column] = cached
+    return cached[1].head(n)
@@ -0,0 +1,163 @@
+"""Restricted query tool the chatbot can call to compute exact answers on the session dataset."""
+
+import json
+
+import pandas as pd
+
+TOOL_NAME = "query_data"
+FILTER_OPS = ["==", "!=", ">", ">=", "<", "<=", "in", "not in", "is null", "not null", "contains"]
+AGG_FUNCS = ["count", "sum", "mean", "median", "min", "max", "nunique", "std"]
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_RESULT_CHARS = 4000
+
+TOOL_DESCRIPTION = (
+    "Run a query against the user's uploaded table and get the exact result. Filters are "
+    "combined with AND, then rows are grouped and aggregated, sorted and limited. Use it for "
+    "counts, totals, averages, top-k values, missing values and row lookups instead of "
+    "estimating from the data summary. Use column '*' with 'count' to count rows."
+)
+
+QUERY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "filters": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "column": {"type": "string"},
+                    "op": {"type": "string", "enum": FILTER_OPS},
+                    "value": {"description": "Comparison value; a list for 'in' and 'not in', omitted for null checks"},
+                },
+                "required": ["column", "op"],
+            },
+        },
+        "group_by": {"type": "array", "items": {"type": "string"}},
+        "aggregations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "column": {"type": "string"},
+                    "func": {"type": "string", "enum": AGG_FUNCS},
+                },
+                "required": ["column", "func"],
+            },
+        },
+        "columns": {"type": "array", "items": {"type": "string"},
+                    "description": "Columns to return when not aggregating"},
+        "sort_by": {"type": "string", "description": "Result column to sort by"},
+        "descending": {"type": "boolean"},
+        "limit": {"type": "integer", "minimum": 1, "maximum": MAX_LIMIT},
+    },
+}
+
+
+def openai_tool() -> dict:
+    return {"type": "function", "function": {"name": TOOL_NAME, "description": TOOL_DESCRIPTION,
+                                             "parameters": QUERY_SCHEMA}}
+
+
+def anthropic_tool() -> dict:
+    return {"name": TOOL_NAME, "description": TOOL_DESCRIPTION, "input_schema": QUERY_SCHEMA}
+
+
+def _check_columns(df: pd.DataFrame, columns) -> None:
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Unknown column(s): {', '.join(map(str, missing))}. Available: {', '.join(map(str, df.columns))}")
+
+
+def _coerce(series: pd.Series, value):
+    """Compare datetimes against timestamps rather than strings."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if isinstance(value, list):
+            return [pd.Timestamp(v) for v in value]
+        return pd.Timestamp(value)
+    return value
+
+
+def _mask(df: pd.DataFrame, filters: list) -> pd.Series:
+    mask = pd.Series(True, index=df.index)
+    for f in filters:
+        column, op = f.get("column"), f.get("op")
+        _check_columns(df, [column])
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unsupported filter op {op!r}; use one of {FILTER_OPS}")
+        series = df[column]
+        value = _coerce(series, f.get("value"))
+        if op == "is null":
+            mask &= series.isna()
+        elif op == "not null":
+            mask &= series.notna()
+        elif op in ("in", "not in"):
+            values = value if isinstance(value, list) else [value]
+            hit = series.isin(values)
+            mask &= hit if op == "in" else ~hit
+        elif op == "contains":
+            mask &= series.astype(str).str.contains(str(value), case=False, regex=False)
+        else:
+            compare = {"==": series.eq, "!=": series.ne, ">": series.gt,
+                       ">=": series.ge, "<": series.lt, "<=": series.le}[op]
+            mask &= compare(value).fillna(False).astype(bool)
+    return mask
+
+
+def run_query(df: pd.DataFrame, spec: dict) -> tuple:
+    """Execute a tool query; returns ``(result, matched_rows)``. Raises ValueError on a bad spec."""
+    filters = spec.get("filters") or []
+    group_by = spec.get("group_by") or []
+    aggregations = spec.get("aggregations") or []
+    limit = min(int(spec.get("limit") or DEFAULT_LIMIT), MAX_LIMIT)
+    _check_columns(df, group_by + [a.get("column") for a in aggregations if a.get("column") != "*"])
+
+    data = df[_mask(df, filters)] if filters else df
+    matched = len(data)
+
+    if aggregations:
+        named = {}
+        for a in aggregations:
+            column, func = a.get("column"), a.get("func")
+            if func not in AGG_FUNCS:
+                raise ValueError(f"Unsupported aggregation {func!r}; use one of {AGG_FUNCS}")
+            if column == "*":
+                if func != "count":
+                    raise ValueError("Column '*' only supports 'count'")
+                named["count_rows"] = (data.columns[0], "size")
+            else:
+                named[f"{func}_{column}"] = (column, func)
+        if group_by:
+            result = data.groupby(group_by, observed=True, dropna=False).agg(**named).reset_index()
+        else:
+            result = pd.DataFrame({name: [data[col].agg(func) if func != "size" else len(data)]
+                                   for name, (col, func) in named.items()})
+    elif group_by:
+        result = data.groupby(group_by, observed=True, dropna=False).size().reset_index(name="count_rows")
+    else:
+        columns = spec.get("columns") or list(df.columns)
+        _check_columns(df, columns)
+        result = data[columns]
+
+    sort_by = spec.get("sort_by")
+    if sort_by:
+        if sort_by not in result.columns:
+            raise ValueError(f"Cannot sort by {sort_by!r}; result columns are {list(result.columns)}")
+        result = result.sort_values(sort_by, ascending=not spec.get("descending", False))
+    return result.head(limit), matched
+
+
+def execute_tool(df: pd.DataFrame, arguments) -> tuple:
+    """Run a tool call and format it for the model; returns ``(text, result or None)``.
+
+    Errors are returned as text so the model can correct its query.
+    """
+    try:
+        spec = json.loads(arguments) if isinstance(arguments, str) else dict(arguments)
+        result, matched = run_query(df, spec)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        return f"Error: {e}", None
+    text = f"Rows matching filters: {matched}\nResult ({len(result)} rows):\n{result.to_csv(index=False)}"
+    if len(text) > MAX_RESULT_CHARS:
+        text = text[:MAX_RESULT_CHARS] + "\n... (truncated; narrow the query or lower the limit)"
+    return text, result
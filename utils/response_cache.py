@@ -0,0 +1,198 @@
+"""Disk-backed cache of chatbot answers, with an optional near-duplicate question tier."""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import streamlit as st
+
+CACHE_DIR = Path(".cache")
+CACHE_FILE = CACHE_DIR / "chat_responses.sqlite3"
+RESPONSE_CACHE_MODES = ["Off", "Exact match", "Exact + similar"]
+DEFAULT_TTL_HOURS = 24
+DEFAULT_MAX_MB = 50
+SIMILARITY_THRESHOLD = 0.85
+SIMILARITY_CANDIDATES = 500
+REPLAY_CHUNK_WORDS = 3
+
+
+def normalize(text: str) -> str:
+    """Case, whitespace and trailing punctuation don't change the question."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _shingles(text: str, n: int = 3) -> set:
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+# Numbers, and identifier-like words such as column_a, revenue2023 or `Sales`
+_ANCHOR = re.compile(r"`[^`]+`|'[^']+'|\"[^\"]+\"|\d+(?:[.,]\d+)*|\w*[_\d]\w*")
+
+
+def anchors(text: str) -> set:
+    """Tokens that change what a question asks for: numbers, quoted names and identifiers."""
+    return set(_ANCHOR.findall(text))
+
+
+# Filler words a rephrased question may add or drop; negations and connectives are kept
+STOPWORDS = frozenset(
+    "a an the of for in on at by to from is are was were be what which who how me my i you "
+    "please show give tell can could would do does list find get".split()
+)
+# Content words shorter than this must match exactly; longer ones may differ by one edit
+TYPO_MIN_LENGTH = 4
+
+
+def content_words(text: str) -> list:
+    return [w for w in re.findall(r"\w+", text) if w not in STOPWORDS]
+
+
+def _one_edit(a: str, b: str) -> bool:
+    """True when ``b`` is ``a`` with one character inserted, deleted, replaced or two swapped."""
+    if min(len(a), len(b)) < TYPO_MIN_LENGTH or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1])
+
+
+def same_words(a: str, b: str) -> bool:
+    """True when both questions have the same content words, up to one typo per word."""
+    wa, wb = Counter(content_words(a)), Counter(content_words(b))
+    shared = wa & wb
+    rest_b = list((wb - shared).elements())
+    for word in (wa - shared).elements():
+        match = next((j for j, other in enumerate(rest_b) if _one_edit(word, other)), None)
+        if match is None:
+            return False
+        rest_b.pop(match)
+    return not rest_b
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of character trigrams, tolerant of typos and reordered words.
+
+    Questions whose numbers or identifiers differ ("... in 2023" and "... in 2024",
+    ``column_a`` and ``column_b``), or whose content words differ beyond a typo
+    ("highest" and "lowest", "price" and "cost"), score 0 however alike the rest of the
+    text is.
+    """
+    if anchors(a) != anchors(b) or not same_words(a, b):
+        return 0.0
+    sa, sb = _shingles(a), _shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+class ResponseCache:
+    """SQLite store of answers keyed on model, dataset version, history and prompt.
+
+    Entries expire after ``ttl`` seconds, and the least recently used ones are evicted
+    once the stored answers exceed ``max_bytes``.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, scope TEXT, prompt TEXT, response TEXT,"
+                " size INTEGER, created REAL, accessed REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope, accessed)")
+
+    @staticmethod
+    def scope(model: str, version, history: list, tools: bool = False) -> str:
+        """Everything the answer depends on besides the latest question."""
+        return _digest(model, version, tools, [(m["role"], normalize(m["content"])) for m in history])
+
+    def get(self, scope: str, prompt: str, ttl: float, threshold: float = None):
+        """Return ``(response, score)`` for an exact or, if ``threshold`` is set, similar prompt."""
+        prompt = normalize(prompt)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - ttl,))
+            row = self._conn.execute(
+                "SELECT key, response FROM responses WHERE key = ?", (_digest(scope, prompt),)
+            ).fetchone()
+            score = 1.0
+            if row is None and threshold is not None:
+                candidates = self._conn.execute(
+                    "SELECT key, response, prompt FROM responses WHERE scope = ? ORDER BY accessed DESC LIMIT ?",
+                    (scope, SIMILARITY_CANDIDATES),
+                ).fetchall()
+                scored = [(similarity(prompt, c[2]), c) for c in candidates]
+                score, best = max(scored, key=lambda s: s[0], default=(0.0, None))
+                row = best[:2] if best is not None and score >= threshold else None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, row[0]))
+        if score == 1.0:
+            self.hits += 1
+        else:
+            self.similar_hits += 1
+        return row[1], score
+
+    def put(self, scope: str, prompt: str, response: str, max_bytes: int):
+        prompt = normalize(prompt)
+        size = len(response.encode()) + len(prompt.encode())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_digest(scope, prompt), scope, prompt, response, size, now, now),
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > max_bytes:
+                # Walk from least recently used until enough bytes are freed
+                freed, stale = 0, []
+                for key, entry_size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    if total - freed <= max_bytes:
+                        break
+                    stale.append((key,))
+                    freed += entry_size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+        self.hits = self.similar_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits,
+                "similar_hits": self.similar_hits, "misses": self.misses}
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(CACHE_FILE)
+
+
+def replay(text: str):
+    """Yield a finished answer in small pieces so it renders through ``st.write_stream``."""
+    words = text.split(" ")
+    for i in range(0, len(words), REPLAY_CHUNK_WORDS):
+        piece = " ".join(words[i:i + REPLAY_CHUNK_WORDS])
+        yield piece if i + REPLAY_CHUNK_WORDS >= len(words) else piece + " "